@@ -48,6 +48,11 @@ def register(subparsers):
         action="store_true",
         help="Review detected cards before adding (toggle foil, remove cards)",
     )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Send the photos as one Message Batch (half the API cost; results can take minutes)",
+    )
     parser.add_argument(
         "--source-image",
         default=None,
@@ -144,8 +149,11 @@ def run(args):
     # Read corners from all images
     all_detections = []
     all_skipped = []
-    for image_path in args.images:
-        detections, skipped = claude.read_card_corners(image_path)
+    if args.batch:
+        results = claude.read_card_corners_batch(args.images)
+    else:
+        results = claude.read_card_corners_many(args.images)
+    for image_path, (detections, skipped) in zip(args.images, results):
         if not detections and not skipped:
             print(f"  Warning: No card corners detected in {image_path}")
             continue
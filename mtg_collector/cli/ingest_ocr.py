@@ -295,7 +295,8 @@ def run(args):
         hints["color"] = args.color
 
     extracted, usage = claude.extract_cards_from_ocr(ocr_texts, args.count, hints)
-    print(f"  Tokens: {usage.input_tokens} in / {usage.output_tokens} out")
+    if usage is not None:
+        print(f"  Tokens: {usage.input_tokens} in / {usage.output_tokens} out")
 
     if not extracted:
         print("Error: Claude could not extract any cards from OCR text.")
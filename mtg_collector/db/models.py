@@ -3,10 +3,13 @@
 import json
 import sqlite3
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from mtg_collector.utils import now_iso, parse_json_array, to_json_array
 
+# Max bound parameters per bulk IN (...) query (SQLite's historical limit is 999)
+_IN_CHUNK = 900
+
 
 @dataclass
 class Card:
@@ -325,6 +328,33 @@ class CardRepository:
             return None
         return self._row_to_card(row)
 
+    def get_many(self, oracle_ids: List[str]) -> Dict[str, Card]:
+        """Get cards for many oracle_ids in bulk. Returns {oracle_id: Card}."""
+        result = {}
+        ids = list(oracle_ids)
+        for i in range(0, len(ids), _IN_CHUNK):
+            chunk = ids[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self.conn.execute(
+                f"SELECT * FROM cards WHERE oracle_id IN ({placeholders})", chunk
+            ):
+                result[row["oracle_id"]] = self._row_to_card(row)
+        return result
+
+    def get_by_names_many(self, names: List[str]) -> Dict[str, Card]:
+        """Get cards by exact name in bulk. Returns {name: Card} for names found."""
+        result = {}
+        names = list(names)
+        for i in range(0, len(names), _IN_CHUNK):
+            chunk = names[i:i + _IN_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self.conn.execute(
+                f"SELECT * FROM cards WHERE name IN ({placeholders})", chunk
+            ):
+                # Match get_by_name: first row wins for duplicate names
+                result.setdefault(row["name"], self._row_to_card(row))
+        return result
+
     def search_by_name(self, name: str) -> Optional[Card]:
         """Search for a card by name (case-insensitive, handles DFCs).
 
@@ -621,6 +651,29 @@ class PrintingRepository:
 
         return self._row_to_printing(row)
 
+    def get_by_set_cn_many(
+        self, pairs: List[Tuple[str, str]]
+    ) -> Dict[Tuple[str, str], Printing]:
+        """Get printings for many (set_code, collector_number) pairs in bulk.
+
+        Returns {(set_code, collector_number): Printing} for pairs found.
+        """
+        result = {}
+        pairs = list(pairs)
+        # Two bound parameters per pair
+        step = _IN_CHUNK // 2
+        for i in range(0, len(pairs), step):
+            chunk = pairs[i:i + step]
+            values = ",".join(["(?, ?)"] * len(chunk))
+            params = [v for pair in chunk for v in pair]
+            for row in self.conn.execute(
+                "SELECT * FROM printings WHERE (set_code, collector_number)"
+                f" IN (VALUES {values})",
+                params,
+            ):
+                result[(row["set_code"], row["collector_number"])] = self._row_to_printing(row)
+        return result
+
     def get_by_oracle_id(self, oracle_id: str) -> List[Printing]:
         """Get all printings for a card."""
         cursor = self.conn.execute(
@@ -629,6 +682,21 @@ class PrintingRepository:
         )
         return [self._row_to_printing(row) for row in cursor]
 
+    def get_first_by_oracle_id(
+        self, oracle_id: str, prefer_set_code: Optional[str] = None
+    ) -> Optional[Printing]:
+        """Get one printing of a card, preferring one from prefer_set_code if any.
+
+        Falls back to the first printing in get_by_oracle_id() order.
+        """
+        cursor = self.conn.execute(
+            "SELECT * FROM printings WHERE oracle_id = ?"
+            " ORDER BY set_code = ? DESC, set_code, collector_number LIMIT 1",
+            (oracle_id, prefer_set_code),
+        )
+        row = cursor.fetchone()
+        return self._row_to_printing(row) if row else None
+
     def get_by_flavor_name(self, name: str, set_code: Optional[str] = None) -> Optional[Printing]:
         """Find a printing by flavor_name (UB/crossover cards with alternate names)."""
         if set_code:
@@ -696,42 +764,45 @@ class CollectionRepository:
     def __init__(self, conn: sqlite3.Connection):
         self.conn = conn
 
+    _INSERT_SQL = """
+        INSERT INTO collection
+        (printing_id, finish, condition, language, purchase_price,
+         acquired_at, source, source_image, notes, tags, tradelist,
+         is_alter, proxy, signed, misprint, status, sale_price, order_id,
+         batch_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    @staticmethod
+    def _insert_params(entry: CollectionEntry) -> tuple:
+        return (
+            entry.printing_id,
+            entry.finish,
+            entry.condition,
+            entry.language,
+            entry.purchase_price,
+            entry.acquired_at,
+            entry.source,
+            entry.source_image,
+            entry.notes,
+            entry.tags,
+            1 if entry.tradelist else 0,
+            1 if entry.alter else 0,
+            1 if entry.proxy else 0,
+            1 if entry.signed else 0,
+            1 if entry.misprint else 0,
+            entry.status,
+            entry.sale_price,
+            entry.order_id,
+            entry.batch_id,
+        )
+
     def add(self, entry: CollectionEntry) -> int:
         """Add a new collection entry. Returns the new ID."""
         if entry.acquired_at is None:
             entry.acquired_at = now_iso()
 
-        cursor = self.conn.execute(
-            """
-            INSERT INTO collection
-            (printing_id, finish, condition, language, purchase_price,
-             acquired_at, source, source_image, notes, tags, tradelist,
-             is_alter, proxy, signed, misprint, status, sale_price, order_id,
-             batch_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                entry.printing_id,
-                entry.finish,
-                entry.condition,
-                entry.language,
-                entry.purchase_price,
-                entry.acquired_at,
-                entry.source,
-                entry.source_image,
-                entry.notes,
-                entry.tags,
-                1 if entry.tradelist else 0,
-                1 if entry.alter else 0,
-                1 if entry.proxy else 0,
-                1 if entry.signed else 0,
-                1 if entry.misprint else 0,
-                entry.status,
-                entry.sale_price,
-                entry.order_id,
-                entry.batch_id,
-            ),
-        )
+        cursor = self.conn.execute(self._INSERT_SQL, self._insert_params(entry))
         new_id = cursor.lastrowid
         # Log the initial status
         self.conn.execute(
@@ -740,6 +811,29 @@ class CollectionRepository:
         )
         return new_id
 
+    def add_many(self, entries: List[CollectionEntry]) -> List[int]:
+        """Add several collection entries in one executemany. Returns the new IDs.
+
+        Each physical card is still its own row; this only batches the
+        round-trips (e.g. the copies of a playset from an import row).
+        """
+        if not entries:
+            return []
+        for entry in entries:
+            if entry.acquired_at is None:
+                entry.acquired_at = now_iso()
+
+        self.conn.executemany(self._INSERT_SQL, [self._insert_params(e) for e in entries])
+        # A single executemany holds the write lock throughout, so the
+        # AUTOINCREMENT ids it assigned are contiguous and end at last_insert_rowid().
+        last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        new_ids = list(range(last_id - len(entries) + 1, last_id + 1))
+        self.conn.executemany(
+            "INSERT INTO status_log (collection_id, from_status, to_status, changed_at) VALUES (?, NULL, ?, ?)",
+            [(new_id, e.status, e.acquired_at) for new_id, e in zip(new_ids, entries)],
+        )
+        return new_ids
+
     def get(self, entry_id: int) -> Optional[CollectionEntry]:
         """Get a collection entry by ID."""
         cursor = self.conn.execute(
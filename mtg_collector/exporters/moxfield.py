@@ -2,11 +2,24 @@
 
 import csv
 import sqlite3
-from collections import defaultdict
+import sys
 from typing import Any, Dict
 
 from mtg_collector.exporters.base import BaseExporter
 
+_FOIL_FINISHES = frozenset({"foil", "etched"})
+
+
+class _Aggregated(dict):
+    """Aggregation buckets created on first access (no per-key factory call)."""
+
+    __slots__ = ()
+
+    def __missing__(self, key):
+        bucket = {"count": 0, "tradelist_count": 0, "entries": []}
+        self[key] = bucket
+        return bucket
+
 
 class MoxfieldExporter(BaseExporter):
     """Export to Moxfield CSV format."""
@@ -44,29 +57,31 @@ class MoxfieldExporter(BaseExporter):
 
         # Aggregate by (name, set, collector_number, condition, finish, language)
         # Moxfield expects aggregated counts
-        aggregated = defaultdict(lambda: {
-            "count": 0,
-            "tradelist_count": 0,
-            "entries": [],
-        })
+        aggregated = _Aggregated()
 
+        # set/condition/finish/language are low-cardinality: interning them makes
+        # key comparisons identity checks and shares one copy per distinct value.
+        # set_code is keyed in the lowercase form Moxfield expects, so rows that
+        # differ only in case share a line and the emit loop writes it as-is.
+        intern = sys.intern
         for entry in entries:
             key = (
                 entry["name"],
-                entry["set_code"],
+                intern(entry["set_code"].lower()),
                 entry["collector_number"],
-                entry["condition"],
-                entry["finish"],
-                entry["language"],
+                intern(entry["condition"]),
+                intern(entry["finish"]),
+                intern(entry["language"]),
             )
-            aggregated[key]["count"] += 1
+            agg = aggregated[key]
+            agg["count"] += 1
             if entry.get("status") == "listed":
-                aggregated[key]["tradelist_count"] += 1
-            aggregated[key]["entries"].append(entry)
+                agg["tradelist_count"] += 1
+            agg["entries"].append(entry)
 
         with open(output_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=self.HEADERS)
-            writer.writeheader()
+            writer = csv.writer(f)
+            writer.writerow(self.HEADERS)
 
             for key, agg in aggregated.items():
                 name, set_code, collector_number, condition, finish, language = key
@@ -80,21 +95,21 @@ class MoxfieldExporter(BaseExporter):
                 has_alter = any(e["is_alter"] for e in agg["entries"])
                 has_proxy = any(e["proxy"] for e in agg["entries"])
 
-                row = {
-                    "Count": agg["count"],
-                    "Tradelist Count": agg["tradelist_count"] if agg["tradelist_count"] > 0 else "",
-                    "Name": name,
-                    "Edition": set_code.lower(),
-                    "Condition": condition,
-                    "Language": language,
-                    "Foil": "foil" if finish in ("foil", "etched") else "",
-                    "Tags": first_entry["tags"] or "",
-                    "Last Modified": "",
-                    "Collector Number": collector_number,
-                    "Alter": "alter" if has_alter else "",
-                    "Proxy": "proxy" if has_proxy else "",
-                    "Purchase Price": f"{avg_price:.2f}" if avg_price is not None else "",
-                }
-                writer.writerow(row)
+                # Positional row, in HEADERS order
+                writer.writerow((
+                    agg["count"],
+                    agg["tradelist_count"] if agg["tradelist_count"] > 0 else "",
+                    name,
+                    set_code,
+                    condition,
+                    language,
+                    "foil" if finish in _FOIL_FINISHES else "",
+                    first_entry["tags"] or "",
+                    "",  # Last Modified
+                    collector_number,
+                    "alter" if has_alter else "",
+                    "proxy" if has_proxy else "",
+                    f"{avg_price:.2f}" if avg_price is not None else "",
+                ))
 
         return len(entries)
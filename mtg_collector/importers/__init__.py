@@ -13,6 +13,16 @@ IMPORTERS = {
     "decklist": DecklistImporter,
 }
 
+# CSV header signatures checked in order: (format, columns, require_all).
+# require_all=False matches when any column is present.
+CSV_SIGNATURES = [
+    ("archidekt", frozenset({"scryfall_uuid", "export_type"}), False),
+    ("deckbox", frozenset({"signed", "artist proof", "altered art"}), False),
+    ("moxfield", frozenset({"edition", "collector number"}), True),
+    # Default guess based on common patterns
+    ("moxfield", frozenset({"count", "name"}), True),
+]
+
 
 def get_importer(format_name: str) -> BaseImporter:
     """Get an importer by format name."""
@@ -63,25 +73,14 @@ def detect_format(file_path: str) -> str:
             f.seek(0)
             reader = csv.reader(f, dialect)
             headers = next(reader, [])
-            headers_lower = [h.lower().strip() for h in headers]
+            header_set = frozenset(h.lower().strip() for h in headers)
     except csv.Error:
         raise ValueError("Could not auto-detect format. Please specify format explicitly.")
 
-    # Check for Archidekt-specific columns
-    if "scryfall_uuid" in headers_lower or "export_type" in headers_lower:
-        return "archidekt"
-
-    # Check for Deckbox-specific columns
-    if "signed" in headers_lower or "artist proof" in headers_lower or "altered art" in headers_lower:
-        return "deckbox"
-
-    # Check for Moxfield columns
-    if "edition" in headers_lower and "collector number" in headers_lower:
-        return "moxfield"
-
-    # Default guess based on common patterns
-    if "count" in headers_lower and "name" in headers_lower:
-        return "moxfield"
+    for fmt, columns, require_all in CSV_SIGNATURES:
+        matched = columns <= header_set if require_all else not columns.isdisjoint(header_set)
+        if matched:
+            return fmt
 
     raise ValueError("Could not auto-detect format. Please specify format explicitly.")
 
@@ -1,10 +1,12 @@
 """Archidekt CSV importer."""
 
 import csv
-from typing import Any, Dict, List, Optional, Tuple
+import sys
+from dataclasses import replace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
 from mtg_collector.db.models import CollectionEntry
-from mtg_collector.importers.base import BaseImporter
+from mtg_collector.importers.base import BaseImporter, _clean_row
 from mtg_collector.utils import now_iso
 
 
@@ -19,23 +21,23 @@ class ArchidektImporter(BaseImporter):
     def source_name(self) -> str:
         return "archidekt_import"
 
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """Parse Archidekt CSV file (semicolon-separated)."""
-        rows = []
-        with open(file_path, "r", encoding="utf-8") as f:
+        with open(file_path, "r", encoding="utf-8", newline="") as f:
             # Archidekt uses semicolon separator
-            reader = csv.DictReader(f, delimiter=";")
+            reader = csv.DictReader(f, delimiter=";", skipinitialspace=True)
             for row in reader:
-                rows.append(row)
-        return rows
+                yield _clean_row(row)
 
     def row_to_lookup(self, row: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
         """Convert Archidekt row to lookup parameters."""
         # Archidekt provides printing UUID which is the best identifier
         # But we also need name for error messages
-        name = row.get("card_name", "").strip() or row.get("english_card_name", "").strip()
-        set_code = row.get("set_code", "").strip() or None
-        collector_number = row.get("collector_number", "").strip() or None
+        name = row.get("card_name", "") or row.get("english_card_name", "")
+        set_code = row.get("set_code", "")
+        # Set codes are low-cardinality and end up as lookup/cache dict keys
+        set_code = sys.intern(set_code) if set_code else None
+        collector_number = row.get("collector_number", "") or None
 
         # Archidekt has separate quantity and foil_quantity
         try:
@@ -53,7 +55,9 @@ class ArchidektImporter(BaseImporter):
 
         return name, set_code, collector_number, quantity + foil_quantity
 
-    def row_to_entry(self, row: Dict[str, Any], printing_id: str) -> CollectionEntry:
+    def row_to_entry(
+        self, row: Dict[str, Any], printing_id: str, acquired_at: Optional[str] = None,
+    ) -> CollectionEntry:
         """Convert Archidekt row to CollectionEntry."""
         # Archidekt tracks foil separately - we need to handle this
         # For simplicity, we'll create entries based on which quantity pool we're drawing from
@@ -67,7 +71,7 @@ class ArchidektImporter(BaseImporter):
             finish = "nonfoil"
 
         # Map language code to full name
-        lang_code = row.get("lang", "en").strip().lower()
+        lang_code = row.get("lang", "en").lower()
         language = self._code_to_language(lang_code)
 
         return CollectionEntry(
@@ -77,7 +81,7 @@ class ArchidektImporter(BaseImporter):
             condition="Near Mint",  # Archidekt doesn't track condition
             language=language,
             purchase_price=None,
-            acquired_at=now_iso(),
+            acquired_at=acquired_at or now_iso(),
             source=self.source_name,
             notes=None,
             tags=None,
@@ -88,12 +92,24 @@ class ArchidektImporter(BaseImporter):
             misprint=False,
         )
 
-    def _resolve_card(self, card_repo, printing_repo, name, set_code, collector_number):
+    def row_to_entries(
+        self, row: Dict[str, Any], printing_id: str, quantity: int, acquired_at: Optional[str] = None,
+    ) -> List[CollectionEntry]:
+        """Build the foil copies first, then the nonfoil ones, from one entry."""
+        foil_qty = min(row.get("_parsed_foil_quantity", 0), quantity)
+        row["_parsed_foil_quantity"] = 0
+        entry = self.row_to_entry(row, printing_id, acquired_at)
+        entries = [entry] * (quantity - foil_qty)
+        if foil_qty:
+            entries[:0] = [replace(entry, finish="foil")] * foil_qty
+        return entries
+
+    def _resolve_card(self, card_repo, printing_repo, name, set_code, collector_number, cache=None):
         """Override to use printing UUID if available."""
         # Check if we have the printing UUID from the current row context
         # This is a bit of a hack since we don't have direct access to the row here
         # The base class will handle this via set_code/collector_number
-        return super()._resolve_card(card_repo, printing_repo, name, set_code, collector_number)
+        return super()._resolve_card(card_repo, printing_repo, name, set_code, collector_number, cache)
 
     def _code_to_language(self, code: str) -> str:
         """Convert language code to full name."""
@@ -1,12 +1,15 @@
 """Base importer interface."""
 
 import json
+import os
 import sqlite3
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
 
-from mtg_collector.db.models import CollectionEntry
+from mtg_collector.db.models import Card, CollectionEntry, Printing
+from mtg_collector.utils import now_iso
 
 
 @dataclass
@@ -23,6 +26,89 @@ class ImportResult:
             self.errors = []
 
 
+# Collection rows per add_many call during import_file
+_INSERT_BATCH = 500
+
+
+def _normalize_lookup(name: str, set_code: Optional[str]) -> Tuple[str, Optional[str]]:
+    """Normalize a (name, set_code) lookup the way the local DB stores them."""
+    # Normalize set_code to lowercase (DB stores lowercase, imports may have uppercase)
+    if set_code:
+        set_code = set_code.lower()
+
+    # Normalize DFC names: Moxfield exports "Front / Back", Scryfall stores "Front // Back"
+    if " / " in name:
+        name = name.replace(" / ", " // ")
+
+    return name, set_code
+
+
+def _clean_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Right-strip every string value of a csv row in place.
+
+    Readers are opened with skipinitialspace=True, so after this one pass the
+    row_to_* methods can read fields without calling .strip() on each access.
+    """
+    for key, value in row.items():
+        if value and isinstance(value, str):
+            row[key] = value.rstrip()
+    return row
+
+
+def _parse_to_list(importer: "BaseImporter", file_path: str) -> List[Dict[str, Any]]:
+    """Worker for BaseImporter.parse_files: materialize one file's rows."""
+    return list(importer.parse_file(file_path))
+
+
+def _flush(conn: sqlite3.Connection, collection_repo, pending: List[List[CollectionEntry]], result: ImportResult) -> None:
+    """Insert the entries of several rows in one add_many.
+
+    If the batch fails it is rolled back and retried one row at a time, so a
+    bad row is recorded as that row's error and the rest are still imported.
+    """
+    conn.execute("SAVEPOINT import_batch")
+    try:
+        collection_repo.add_many([entry for entries in pending for entry in entries])
+    except Exception:
+        conn.execute("ROLLBACK TO import_batch")
+        for entries in pending:
+            conn.execute("SAVEPOINT import_row")
+            try:
+                collection_repo.add_many(entries)
+            except Exception as e:
+                conn.execute("ROLLBACK TO import_row")
+                result.errors.append(f"Error processing row: {e}")
+                result.cards_added -= len(entries)
+                result.cards_skipped += 1
+            conn.execute("RELEASE import_row")
+    conn.execute("RELEASE import_batch")
+
+
+class ResolveCache:
+    """Bulk-prefetched printings/cards for a whole import file.
+
+    Built once from every row's lookup so _resolve_card can answer the
+    common cases from dicts instead of issuing per-row queries.
+    """
+
+    def __init__(self, card_repo, printing_repo, lookups: List[Tuple[str, Optional[str], Optional[str]]]):
+        pairs = set()
+        names = set()
+        for name, set_code, collector_number in lookups:
+            name, set_code = _normalize_lookup(name, set_code)
+            names.add(name)
+            if set_code and collector_number:
+                pairs.add((set_code, collector_number))
+
+        self.printings_by_set_cn: Dict[Tuple[str, str], Printing] = printing_repo.get_by_set_cn_many(pairs)
+        self.cards_by_name: Dict[str, Card] = card_repo.get_by_names_many(names)
+        oracle_ids = {p.oracle_id for p in self.printings_by_set_cn.values()}
+        oracle_ids.difference_update(c.oracle_id for c in self.cards_by_name.values())
+        self.cards_by_oracle_id: Dict[str, Card] = card_repo.get_many(oracle_ids)
+        for card in self.cards_by_name.values():
+            self.cards_by_oracle_id[card.oracle_id] = card
+
+
 class BaseImporter(ABC):
     """Abstract base class for collection importers."""
 
@@ -39,18 +125,34 @@ class BaseImporter(ABC):
         pass
 
     @abstractmethod
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """
-        Parse the import file and return raw row data.
+        Parse the import file and yield raw row data.
 
         Args:
             file_path: Path to import file
 
-        Returns:
-            List of dicts, one per row
+        Yields:
+            One dict per row; wrap in list() if you need random access
         """
         pass
 
+    def parse_files(self, file_paths: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Parse several import files in worker processes and yield their rows.
+
+        Rows come back in file order. A single file is parsed in-process, since
+        spawning workers would cost more than the parse.
+        """
+        if len(file_paths) < 2:
+            for file_path in file_paths:
+                yield from self.parse_file(file_path)
+            return
+
+        with ProcessPoolExecutor(max_workers=min(len(file_paths), os.cpu_count() or 1)) as ex:
+            for rows in ex.map(_parse_to_list, [self] * len(file_paths), file_paths):
+                yield from rows
+
     @abstractmethod
     def row_to_lookup(self, row: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
         """
@@ -65,19 +167,34 @@ class BaseImporter(ABC):
         pass
 
     @abstractmethod
-    def row_to_entry(self, row: Dict[str, Any], printing_id: str) -> CollectionEntry:
+    def row_to_entry(
+        self, row: Dict[str, Any], printing_id: str, acquired_at: Optional[str] = None,
+    ) -> CollectionEntry:
         """
         Convert a row to a CollectionEntry.
 
         Args:
             row: Parsed row dict
             printing_id: Resolved printing ID
+            acquired_at: Timestamp to stamp on the entry (defaults to now)
 
         Returns:
             CollectionEntry ready to insert
         """
         pass
 
+    def row_to_entries(
+        self, row: Dict[str, Any], printing_id: str, quantity: int, acquired_at: Optional[str] = None,
+    ) -> List[CollectionEntry]:
+        """
+        Convert a row to the CollectionEntry objects for each of its copies.
+
+        The copies of a row are identical, so one entry is built and repeated;
+        add_many only reads them. Override when copies differ (e.g. Archidekt
+        splits a row into foil and nonfoil copies).
+        """
+        return [self.row_to_entry(row, printing_id, acquired_at)] * quantity
+
     def import_file(
         self,
         file_path: str,
@@ -102,20 +219,43 @@ class BaseImporter(ABC):
         """
         result = ImportResult()
 
-        rows = self.parse_file(file_path)
-        result.total_rows = len(rows)
-
-        for row in rows:
+        planned = []
+        for row in self.parse_file(file_path):
+            result.total_rows += 1
             try:
-                name, set_code, collector_number, quantity = self.row_to_lookup(row)
+                planned.append((row, self.row_to_lookup(row)))
+            except Exception as e:
+                result.errors.append(f"Error processing row: {e}")
+                result.cards_skipped += 1
 
+        cache = ResolveCache(
+            card_repo, printing_repo,
+            [(name, set_code, cn) for _, (name, set_code, cn, _) in planned if name],
+        )
+
+        # One import is one acquisition event: stamp every entry the same
+        acquired_at = now_iso()
+        # Exports often repeat a lookup (same card in several conditions or
+        # finishes); resolve each distinct one once.
+        resolved: Dict[Tuple[str, Optional[str], Optional[str]], Optional[str]] = {}
+        # Entries from consecutive rows are inserted together in add_many
+        # batches, kept per row so a failed batch can be retried row by row
+        pending: List[List[CollectionEntry]] = []
+        pending_count = 0
+
+        for row, (name, set_code, collector_number, quantity) in planned:
+            try:
                 if not name:
                     result.cards_skipped += 1
                     continue
 
-                printing_id = self._resolve_card(
-                    card_repo, printing_repo, name, set_code, collector_number,
-                )
+                lookup = (name, set_code, collector_number)
+                if lookup in resolved:
+                    printing_id = resolved[lookup]
+                else:
+                    printing_id = resolved[lookup] = self._resolve_card(
+                        card_repo, printing_repo, name, set_code, collector_number, cache,
+                    )
 
                 if not printing_id:
                     result.errors.append(f"Could not find: {name} ({set_code or 'any set'})")
@@ -123,9 +263,9 @@ class BaseImporter(ABC):
                     continue
 
                 if not dry_run:
-                    for _ in range(quantity):
-                        entry = self.row_to_entry(row, printing_id)
-                        collection_repo.add(entry)
+                    entries = self.row_to_entries(row, printing_id, quantity, acquired_at)
+                    pending.append(entries)
+                    pending_count += len(entries)
 
                 result.cards_added += quantity
 
@@ -133,7 +273,14 @@ class BaseImporter(ABC):
                 result.errors.append(f"Error processing row: {e}")
                 result.cards_skipped += 1
 
+            if pending_count >= _INSERT_BATCH:
+                _flush(conn, collection_repo, pending, result)
+                pending = []
+                pending_count = 0
+
         if not dry_run:
+            if pending:
+                _flush(conn, collection_repo, pending, result)
             conn.commit()
 
         return result
@@ -145,21 +292,25 @@ class BaseImporter(ABC):
         name: str,
         set_code: Optional[str],
         collector_number: Optional[str],
+        cache: Optional[ResolveCache] = None,
     ) -> Optional[str]:
-        """Resolve a card using the local database. Returns printing_id or None."""
-        # Normalize set_code to lowercase (DB stores lowercase, imports may have uppercase)
-        if set_code:
-            set_code = set_code.lower()
+        """Resolve a card using the local database. Returns printing_id or None.
 
-        # Normalize DFC names: Moxfield exports "Front / Back", Scryfall stores "Front // Back"
-        if " / " in name:
-            name = name.replace(" / ", " // ")
+        If a ResolveCache is given, bulk-prefetched lookups are consulted first.
+        """
+        name, set_code = _normalize_lookup(name, set_code)
 
         # Strategy 1: If set_code + collector_number, look up printing and validate name
         if set_code and collector_number:
-            printing = printing_repo.get_by_set_cn(set_code, collector_number)
+            if cache is not None:
+                printing = cache.printings_by_set_cn.get((set_code, collector_number))
+            else:
+                printing = printing_repo.get_by_set_cn(set_code, collector_number)
             if printing:
-                card = card_repo.get(printing.oracle_id)
+                if cache is not None:
+                    card = cache.cards_by_oracle_id.get(printing.oracle_id)
+                else:
+                    card = card_repo.get(printing.oracle_id)
                 if card and self._name_matches(name, card.name):
                     return printing.printing_id
                 # Check flavor_name for UB/crossover cards (e.g. TMNT set
@@ -172,15 +323,16 @@ class BaseImporter(ABC):
                 # Name mismatch — fall through to name-based lookup
 
         # Strategy 2: Name-based lookup
-        card = card_repo.get_by_name(name) or card_repo.search_by_name(name)
+        if cache is not None:
+            card = cache.cards_by_name.get(name)
+        else:
+            card = card_repo.get_by_name(name)
+        card = card or card_repo.search_by_name(name)
         if card:
-            printings = printing_repo.get_by_oracle_id(card.oracle_id)
-            if printings:
-                if set_code:
-                    for p in printings:
-                        if p.set_code.lower() == set_code.lower():
-                            return p.printing_id
-                return printings[0].printing_id
+            # Prefer a printing from the requested set, else the first printing
+            printing = printing_repo.get_first_by_oracle_id(card.oracle_id, set_code)
+            if printing:
+                return printing.printing_id
 
         # Strategy 3: Flavor name lookup (UB/crossover cards with alternate names)
         printing = printing_repo.get_by_flavor_name(name, set_code)
@@ -1,11 +1,15 @@
 """Deckbox CSV importer."""
 
 import csv
-from typing import Any, Dict, List, Optional, Tuple
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 from mtg_collector.db.models import CollectionEntry
-from mtg_collector.importers.base import BaseImporter
-from mtg_collector.utils import normalize_condition, now_iso
+from mtg_collector.importers.base import BaseImporter, _clean_row
+from mtg_collector.utils import normalize_condition, now_iso, parse_price
+
+# Values Deckbox (and hand-edited exports) use for a set flag column
+_TRUTHY = frozenset({"yes", "true", "1"})
 
 
 class DeckboxImporter(BaseImporter):
@@ -19,24 +23,22 @@ class DeckboxImporter(BaseImporter):
     def source_name(self) -> str:
         return "deckbox_import"
 
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """Parse Deckbox CSV file."""
-        rows = []
-        with open(file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
+        with open(file_path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f, skipinitialspace=True)
             for row in reader:
-                rows.append(row)
-        return rows
+                yield _clean_row(row)
 
     def row_to_lookup(self, row: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
         """Convert Deckbox row to lookup parameters."""
-        name = row.get("Name", "").strip()
+        name = row.get("Name", "")
 
         # Deckbox uses full set name in "Edition" column
         # We need to map it to set code - this is tricky
         # For now, we'll rely on the collector number search
-        edition = row.get("Edition", "").strip()
-        collector_number = row.get("Card Number", "").strip() or None
+        edition = row.get("Edition", "")
+        collector_number = row.get("Card Number", "") or None
 
         # Store edition for potential future use
         row["_edition_name"] = edition
@@ -51,35 +53,37 @@ class DeckboxImporter(BaseImporter):
         # We'll search by name and collector number
         return name, None, collector_number, quantity
 
-    def row_to_entry(self, row: Dict[str, Any], printing_id: str) -> CollectionEntry:
+    def row_to_entry(
+        self, row: Dict[str, Any], printing_id: str, acquired_at: Optional[str] = None,
+    ) -> CollectionEntry:
         """Convert Deckbox row to CollectionEntry."""
+        # Read and lowercase every flag column once up front
+        get = row.get
+        foil_val = (get("Foil") or "").lower()
+        signed_val = (get("Signed") or "").lower()
+        altered_val = (get("Altered Art") or "").lower()
+        misprint_val = (get("Misprint") or "").lower()
+        price_str = get("My Price") or ""
+        tradelist_str = get("Tradelist Count") or ""
+
         # Determine finish
-        foil_val = row.get("Foil", "").strip().lower()
-        finish = "foil" if foil_val in ("foil", "yes", "true", "1") else "nonfoil"
+        finish = "foil" if foil_val == "foil" or foil_val in _TRUTHY else "nonfoil"
 
         # Normalize condition - Deckbox uses full names
-        condition = normalize_condition(row.get("Condition", "Near Mint"))
+        condition = normalize_condition(get("Condition", "Near Mint"))
 
         # Get language
-        language = row.get("Language", "English").strip() or "English"
+        language = sys.intern(get("Language") or "English")
 
         # Get purchase price
-        price_str = row.get("My Price", "").strip()
-        purchase_price = None
-        if price_str:
-            try:
-                price_str = price_str.replace("$", "").replace(",", "")
-                purchase_price = float(price_str)
-            except ValueError:
-                pass
+        purchase_price = parse_price(price_str)
 
         # Get Deckbox-specific flags
-        signed = row.get("Signed", "").strip().lower() in ("signed", "yes", "true", "1")
-        alter = row.get("Altered Art", "").strip().lower() in ("altered", "yes", "true", "1")
-        misprint = row.get("Misprint", "").strip().lower() in ("misprint", "yes", "true", "1")
+        signed = signed_val == "signed" or signed_val in _TRUTHY
+        alter = altered_val == "altered" or altered_val in _TRUTHY
+        misprint = misprint_val == "misprint" or misprint_val in _TRUTHY
 
         # Check tradelist flag (tradelist doesn't change ownership status)
-        tradelist_str = row.get("Tradelist Count", "").strip()
         tradelist = False
         if tradelist_str:
             try:
@@ -95,7 +99,7 @@ class DeckboxImporter(BaseImporter):
             condition=condition,
             language=language,
             purchase_price=purchase_price,
-            acquired_at=now_iso(),
+            acquired_at=acquired_at or now_iso(),
             source=self.source_name,
             notes=None,
             tags=None,
@@ -7,7 +7,9 @@ Handles lines like:
 Format: <quantity> <card name> (<set_code>) <collector_number> [*F*]
 """
 
-from typing import Any, Dict, List, Optional, Tuple
+import re
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 from mtg_collector.db.models import CollectionEntry
 from mtg_collector.importers.base import BaseImporter
@@ -24,24 +26,49 @@ class ParseError(ValueError):
         super().__init__(f"Line {line_number}: {reason}: {line_text!r}")
 
 
+# Lowercased Foil values that mean the card is foil
+_FOIL_TRUE = frozenset({"foil", "yes", "true", "1"})
+
+# The common line shape in one pass: quantity, a name without "(", the
+# "(SET)" group, then collector number/flags with no further parens. The bound
+# fullmatch skips the attribute lookup on every line.
+_match_line = re.compile(r"([0-9]+) ([^(]*)\(([^()]*)\)([^()]*)").fullmatch
+
+
 def parse_line(line: str, line_number: int) -> Dict[str, Any]:
     """Parse a single deck list line into a structured dict.
 
     Structure: <quantity> <card name> (<set_code>) <collector_number> [*F*]
     The parenthesized set code is the structural anchor.
     """
-    # Step 1: Find the quantity (leading integer separated by space)
-    space_idx = line.find(" ")
-    if space_idx == -1:
+    m = _match_line(line)
+    if m:
+        qty_str, card_name, set_code, after_set = m.groups()
+        card_name = card_name.strip()
+        set_code = sys.intern(set_code.strip())
+        tokens = after_set.split(None, 1)
+        if card_name and set_code and tokens:
+            return {
+                "Count": str(int(qty_str)),
+                "Name": card_name,
+                "Edition": set_code,
+                "Collector Number": tokens[0],
+                "Foil": "foil" if len(tokens) > 1 and "*F*" in tokens[1] else "",
+            }
+
+    # Lines the pattern does not cover take the step-by-step parse, which
+    # also reports what is wrong with malformed ones
+
+    # Step 1: Split off the quantity (leading integer separated by space)
+    qty_str, sep, rest = line.partition(" ")
+    if not sep:
         raise ParseError(line_number, line, "expected '<quantity> <card name> (<set>) <number>'")
 
-    qty_str = line[:space_idx]
-    if not qty_str.isdigit():
+    # isdecimal, not isdigit: superscripts like "²" pass isdigit but not int()
+    if not qty_str.isdecimal():
         raise ParseError(line_number, line, f"expected quantity as first token, got {qty_str!r}")
     quantity = int(qty_str)
 
-    rest = line[space_idx + 1:]
-
     # Step 2: Find the set code — last parenthesized group "(XXX)"
     open_paren = rest.rfind("(")
     close_paren = rest.rfind(")")
@@ -49,7 +76,8 @@ def parse_line(line: str, line_number: int) -> Dict[str, Any]:
     if open_paren == -1 or close_paren == -1 or close_paren < open_paren:
         raise ParseError(line_number, line, "missing set code — expected '(SET)' somewhere in the line")
 
-    set_code = rest[open_paren + 1:close_paren].strip()
+    # A few hundred set codes repeat across every line; share one copy of each
+    set_code = sys.intern(rest[open_paren + 1:close_paren].strip())
     if not set_code:
         raise ParseError(line_number, line, "empty set code in parentheses")
 
@@ -63,12 +91,11 @@ def parse_line(line: str, line_number: int) -> Dict[str, Any]:
     if not after_set:
         raise ParseError(line_number, line, "missing collector number after set code")
 
-    # Split the remainder into tokens: first token is collector number, rest are flags
-    tokens = after_set.split()
+    # First token is the collector number; the rest are flags, scanned for
+    # "*F*" as a substring rather than split into a token list
+    tokens = after_set.split(None, 1)
     collector_number = tokens[0]
-    flags = tokens[1:]
-
-    foil = "*F*" in flags
+    foil = len(tokens) > 1 and "*F*" in tokens[1]
 
     return {
         "Count": str(quantity),
@@ -90,37 +117,35 @@ class DecklistImporter(BaseImporter):
     def source_name(self) -> str:
         return "decklist_import"
 
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """Parse text deck list file, one card per line.
 
-        Raises ParseError with line number and reason on malformed lines.
+        Raises ParseError with line number and reason when iteration reaches a
+        malformed line.
         """
-        rows = []
-        with open(file_path, "r", encoding="utf-8") as f:
-            for line_number, line in enumerate(f, start=1):
-                line = line.strip()
-                if not line:
-                    continue
-                rows.append(parse_line(line, line_number))
-        return rows
+        # Read raw bytes and decode once: skips the text layer's incremental
+        # decoder/newline translation, and splitlines() handles \r\n anyway
+        with open(file_path, "rb") as f:
+            data = f.read().decode("utf-8")
+
+        for line_number, line in enumerate(data.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            yield parse_line(line, line_number)
 
     def row_to_lookup(self, row: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
         """Convert deck list row to lookup parameters."""
-        name = row.get("Name", "").strip()
-        set_code = row.get("Edition", "").strip() or None
-        collector_number = row.get("Collector Number", "").strip() or None
-
-        try:
-            quantity = int(row.get("Count", 1))
-        except (ValueError, TypeError):
-            quantity = 1
-
-        return name, set_code, collector_number, quantity
+        # parse_line always sets every key, already stripped, with a non-empty
+        # set code and collector number and a validated numeric Count
+        return row["Name"], row["Edition"], row["Collector Number"], int(row["Count"])
 
-    def row_to_entry(self, row: Dict[str, Any], printing_id: str) -> CollectionEntry:
+    def row_to_entry(
+        self, row: Dict[str, Any], printing_id: str, acquired_at: Optional[str] = None,
+    ) -> CollectionEntry:
         """Convert deck list row to CollectionEntry."""
-        foil_val = row.get("Foil", "").strip().lower()
-        finish = "foil" if foil_val in ("foil", "yes", "true", "1") else "nonfoil"
+        foil_val = row.get("Foil", "").lower()
+        finish = "foil" if foil_val in _FOIL_TRUE else "nonfoil"
 
         return CollectionEntry(
             id=None,
@@ -129,7 +154,7 @@ class DecklistImporter(BaseImporter):
             condition="Near Mint",
             language="English",
             purchase_price=None,
-            acquired_at=now_iso(),
+            acquired_at=acquired_at or now_iso(),
             source=self.source_name,
             notes=None,
             tags=None,
@@ -1,11 +1,17 @@
 """Moxfield CSV importer."""
 
 import csv
-from typing import Any, Dict, List, Optional, Tuple
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
 
 from mtg_collector.db.models import CollectionEntry
 from mtg_collector.importers.base import BaseImporter
-from mtg_collector.utils import normalize_condition, now_iso
+from mtg_collector.utils import normalize_condition, now_iso, parse_price
+
+# Lowercased column values that mark a flag as set
+_FOIL_TRUE = frozenset({"foil", "etched", "yes", "true", "1"})
+_ALTER_TRUE = frozenset({"alter", "yes", "true", "1"})
+_PROXY_TRUE = frozenset({"proxy", "yes", "true", "1"})
 
 
 class MoxfieldImporter(BaseImporter):
@@ -19,20 +25,27 @@ class MoxfieldImporter(BaseImporter):
     def source_name(self) -> str:
         return "moxfield_import"
 
-    def parse_file(self, file_path: str) -> List[Dict[str, Any]]:
+    def parse_file(self, file_path: str) -> Iterator[Dict[str, Any]]:
         """Parse Moxfield CSV file."""
-        rows = []
-        with open(file_path, "r", encoding="utf-8") as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                rows.append(row)
-        return rows
+        with open(file_path, "r", encoding="utf-8", newline="") as f:
+            # Plain csv.reader zipped against the header: rows stay dicts (the
+            # web import round-trips them as JSON) without DictReader's
+            # per-row Python overhead, and values are right-stripped in the
+            # same comprehension.
+            reader = csv.reader(f, skipinitialspace=True)
+            header = [name.rstrip() for name in next(reader, [])]
+            for values in reader:
+                if not values:
+                    continue
+                yield {key: value.rstrip() for key, value in zip(header, values)}
 
     def row_to_lookup(self, row: Dict[str, Any]) -> Tuple[Optional[str], Optional[str], Optional[str], int]:
         """Convert Moxfield row to lookup parameters."""
-        name = row.get("Name", "").strip()
-        set_code = row.get("Edition", "").strip() or None
-        collector_number = row.get("Collector Number", "").strip() or None
+        name = row.get("Name", "")
+        set_code = row.get("Edition", "")
+        # Set codes are low-cardinality and end up as lookup/cache dict keys
+        set_code = sys.intern(set_code) if set_code else None
+        collector_number = row.get("Collector Number", "") or None
 
         # Get quantity
         try:
@@ -42,38 +55,34 @@ class MoxfieldImporter(BaseImporter):
 
         return name, set_code, collector_number, quantity
 
-    def row_to_entry(self, row: Dict[str, Any], printing_id: str) -> CollectionEntry:
+    def row_to_entry(
+        self, row: Dict[str, Any], printing_id: str, acquired_at: Optional[str] = None,
+    ) -> CollectionEntry:
         """Convert Moxfield row to CollectionEntry."""
+        # Optional columns (Foil/Alter/Proxy/Tradelist Count) are usually absent
+        # or blank, so each is only decoded when it actually holds a value
+        foil_val = row.get("Foil")
+        alter_val = row.get("Alter")
+        proxy_val = row.get("Proxy")
+        tradelist_str = row.get("Tradelist Count")
+
         # Determine finish
-        foil_val = row.get("Foil", "").strip().lower()
-        if foil_val in ("foil", "etched", "yes", "true", "1"):
-            finish = "foil"
-        else:
-            finish = "nonfoil"
+        finish = "foil" if foil_val and foil_val.lower() in _FOIL_TRUE else "nonfoil"
 
         # Normalize condition
         condition = normalize_condition(row.get("Condition", "Near Mint"))
 
         # Get language
-        language = row.get("Language", "English").strip() or "English"
+        language = sys.intern(row.get("Language", "English") or "English")
 
         # Get purchase price
-        price_str = row.get("Purchase Price", "").strip()
-        purchase_price = None
-        if price_str:
-            try:
-                # Remove currency symbols
-                price_str = price_str.replace("$", "").replace(",", "")
-                purchase_price = float(price_str)
-            except ValueError:
-                pass
+        purchase_price = parse_price(row.get("Purchase Price", ""))
 
         # Get flags
-        alter = row.get("Alter", "").strip().lower() in ("alter", "yes", "true", "1")
-        proxy = row.get("Proxy", "").strip().lower() in ("proxy", "yes", "true", "1")
+        alter = bool(alter_val) and alter_val.lower() in _ALTER_TRUE
+        proxy = bool(proxy_val) and proxy_val.lower() in _PROXY_TRUE
 
         # Check tradelist flag (tradelist doesn't change ownership status)
-        tradelist_str = row.get("Tradelist Count", "").strip()
         tradelist = False
         if tradelist_str:
             try:
@@ -89,10 +98,10 @@ class MoxfieldImporter(BaseImporter):
             condition=condition,
             language=language,
             purchase_price=purchase_price,
-            acquired_at=now_iso(),
+            acquired_at=acquired_at or now_iso(),
             source=self.source_name,
             notes=None,
-            tags=row.get("Tags", "").strip() or None,
+            tags=row.get("Tags") or None,
             tradelist=tradelist,
             alter=alter,
             proxy=proxy,
@@ -1,22 +1,37 @@
 """Tool-using Claude agent service for MTG card identification from photos."""
 
+import functools
+import hashlib
 import json
+import random
+import re
 import sqlite3
 import sys
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 
 import anthropic
-import httpx
 
 from mtg_collector.db.connection import get_db_path
-from mtg_collector.services.claude import ClaudeVision
+from mtg_collector.services.claude import ClaudeVision, get_client
 
 AGENT_MODEL_HAIKU = "claude-haiku-4-5-20251001"
 AGENT_MODEL_SONNET = "claude-sonnet-4-6"
 VISION_MODEL = "claude-opus-4-6"
 DEFAULT_MAX_CALLS = 12
-LARGE_FRAGMENT_THRESHOLD = 70
+# Output cap for agent turns: room for brief reasoning plus tool calls, or for
+# an end_turn JSON answer listing a handful of cards' printing_ids
+AGENT_TURN_MAX_TOKENS = 1500
+NO_PROGRESS_UPGRADE_THRESHOLD = 2  # repeated dead-end queries before Haiku → Sonnet
+FRAGMENT_PRUNE_THRESHOLD = 60  # OCR fragments above which low-confidence ones are dropped
+SESSION_CACHE_SIZE = 256  # finished sessions remembered by fragment fingerprint
+SESSION_CACHE_MIN_CHARS = 60  # letters/digits of distinct OCR text a session needs to be cached
+SPECULATIVE_VISION_THRESHOLD = 3  # OCR fragments below which analyze_image starts with the session
 CONTEXT_UPGRADE_THRESHOLD = 8_000  # input tokens; switch Haiku → Sonnet if context grows large
+HISTORY_COMPACT_THRESHOLD = 6_000  # prompt growth (tokens, incl. cached) past which old DB results are cleared
 
 CARD_STRUCTURE = """\
 CARD LAYOUT (top to bottom):
@@ -43,21 +58,6 @@ All of these text regions belong to the SAME card.
 BOTTOM-LEFT INFO — this area has changed across Magic's history. All info below is on
 separate lines from each other; items are NOT adjacent on the same line.
 
-Era 1: Alpha through Alliances (1993–1996)
-  - "Illus. <Artist Name>" (centered below text box)
-  - Copyright line (year added from Legends onward)
-  - NO collector number, NO set code
-
-Era 2: Exodus through 7th Edition (1998–2002) — pre-modern frame
-  - "Illus. <Artist Name>" (centered)
-  - "CN/TOTAL" collector number (e.g. "47/143") + copyright/trademark on same line
-  - NO set code printed
-
-Era 3: 8th Edition through Magic 2014 (2003–2013) — modern frame
-  - "Illus. <Artist Name>" (left-aligned)
-  - "CN/TOTAL" collector number + copyright/trademark
-  - NO set code printed
-
 Era 4: Magic 2015 through Phyrexia: All Will Be One (2014–2023) — M15 frame
   - Black info bar at bottom of card (the "OCR area")
   - Line 1: "CN/TOTAL RARITY" (e.g. "122/269 R") — rarity is C/U/R/M
@@ -77,7 +77,26 @@ The paintbrush icon before the artist name may be misread as digits (e.g. "00661
 see unexpected digits directly before an artist name, they are likely the paintbrush icon,
 not a real number."""
 
-SYSTEM_PROMPT = """\
+# Bottom-left info for cards printed before the M15 frame (Eras 1-3)
+OLD_CARD_STRUCTURE = """\
+OLDER BOTTOM-LEFT INFO (before Magic 2015):
+
+Era 1: Alpha through Alliances (1993–1996)
+  - "Illus. <Artist Name>" (centered below text box)
+  - Copyright line (year added from Legends onward)
+  - NO collector number, NO set code
+
+Era 2: Exodus through 7th Edition (1998–2002) — pre-modern frame
+  - "Illus. <Artist Name>" (centered)
+  - "CN/TOTAL" collector number (e.g. "47/143") + copyright/trademark on same line
+  - NO set code printed
+
+Era 3: 8th Edition through Magic 2014 (2003–2013) — modern frame
+  - "Illus. <Artist Name>" (left-aligned)
+  - "CN/TOTAL" collector number + copyright/trademark
+  - NO set code printed"""
+
+SYSTEM_CORE = """\
 You are an expert Magic: The Gathering card identifier running in an automated pipeline.
 You receive OCR text fragments from a photo of a single MTG card. The text
 fragments indicate position via bounding boxes,
@@ -98,6 +117,8 @@ Strategy:
 2. Search to verify using query_local_db — when disambiguating printings, JOIN sets to get
    set_name and released_at so you can reason about which sets are plausible.
    ALWAYS SELECT printing_id in your queries — you will need these IDs for your final output.
+   When you have several names to check (several cards, or several readings of a garbled
+   name), prefer one query_local_db_batch call over a query_local_db call per name.
 3. If OCR and DB queries leave multiple plausible printings, consider calling analyze_image.
    Always search the DB first so you have context to interpret the vision results.
    Do NOT use analyze_image to distinguish older set reprints that differ only by border color,
@@ -106,11 +127,16 @@ Strategy:
    alternate art, or promo vs regular versions of newer cards.
 4. If you have found zero candidates, call analyze_image before giving up. Never return
    an empty result without trying vision first.
-5. Stop calling tools and emit ALL remaining candidate printing_ids.
+5. Stop calling tools and emit ALL remaining candidate printing_ids, most likely first, as
+   a single JSON object and nothing else:
+   {"cards": [{"name": "...", "printing_ids": ["..."], "fragment_indices": [0]}]}
 
 OCR BOUNDING BOXES
 
 Cards will ALWAYS be positioned vertically in an image. The aspect ratio of a Magic card is 63:88 (wide:tall).
+When fragments fall into separate side-by-side columns, the listing groups them under
+"=== GROUP n (x a-b) ===" headers. A group is usually one card (cards stacked vertically share
+a group). Fragment indices stay global across groups.
 
 """ + CARD_STRUCTURE + """
 
@@ -138,23 +164,51 @@ resolve the printing, still return all remaining plausible printing_ids.
 
 KNOWN HARD CASES
 The DISAMBIGUATION RULE applies in these cases: Return all reasonable candidates.
+* OCR gives you text printed on the card. The card database contains modern wordings of rules
+  text on cards (aka Oracle text). These can be very different, so have caution when doing
+  rules text matching.
+* Sometimes photos contain cards that are clearly visible in the foreground, and others that are
+  in the background, partly visible. Only identify foreground cards.
+"""
+
+SYSTEM_OLD_CARDS_APPENDIX = OLD_CARD_STRUCTURE + """
+
+KNOWN HARD CASES — OLDER CARDS
+The DISAMBIGUATION RULE applies in these cases too: Return all reasonable candidates.
 * 3rd Edition (Revised, set code 3ed), 4th Edition (4ed), and 5th edition (5ed) are
   very similar: White-bordered, no set symbol, similar wording. 4th edition and 5th edition
   have dates under the artist line, so high-confidence OCR can help distinguish, but 4ed and 5ed
   are nearly identical.
 * Similarly, distinguishing between Alpha and Beta can be difficult even for humans: Both
   black-bordered with identical wordings across most cards.
-* OCR gives you text printed on the card. The card database contains modern wordings of rules
-  text on cards (aka Oracle text). These can be very different, so have caution when doing
-  rules text matching.
-* Sometimes photos contain cards that are clearly visible in the foreground, and others that are
-  in the background, partly visible. Only identify foreground cards.
 """
 
+# Each variant ends in its own breakpoint, so each is cached under its own key
 SYSTEM_CONTENT = [
-    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+    {"type": "text", "text": SYSTEM_CORE},
+    {"type": "text", "text": SYSTEM_OLD_CARDS_APPENDIX, "cache_control": {"type": "ephemeral"}},
+]
+SYSTEM_CONTENT_MODERN = [
+    {"type": "text", "text": SYSTEM_CORE, "cache_control": {"type": "ephemeral"}},
 ]
 
+# Info-bar text only printed on M15-and-later frames: "R0092" (Era 5 collector
+# number), "122/269 R" (Era 4 collector number + rarity), "M15 . EN" (set + language).
+# Era 5 numbers are zero-padded, so copyright years OCR'd as "C1993" don't match.
+_MODERN_INFO = re.compile(
+    r"\b[CURMLST] ?0\d{3}\b"
+    r"|\b\d{1,4}/\d{1,4} [CURMLST]\b"
+    r"|\b[A-Z0-9]{3,5} ?[.•·*] ?(?:EN|DE|FR|IT|ES|PT|JA|JP|KO|RU|ZHS|ZHT|PH)\b"
+)
+
+
+def _system_content(fragments: list[dict]) -> list[dict]:
+    """System prompt for a session, without the older-card appendix when the
+    OCR shows an M15-or-later info bar."""
+    if any(_MODERN_INFO.search(f["text"]) for f in fragments):
+        return SYSTEM_CONTENT_MODERN
+    return SYSTEM_CONTENT
+
 OUTPUT_SCHEMA = {
     "type": "object",
     "properties": {
@@ -219,20 +273,55 @@ _ANALYZE_IMAGE_TOOL = {
     "cache_control": {"type": "ephemeral"},
 }
 
+_BATCH_MAX_QUERIES = 20
+
+_BATCH_QUERY_TOOL = {
+    "name": "query_local_db_batch",
+    "description": (
+        "Look up the printings of several cards in one call. Each query is a card name "
+        "(case-insensitive; the front face of a double-faced card also matches) and an "
+        "optional set code. Returns printing_id, name, set_code, set_name, released_at, "
+        "collector_number, rarity, artist and finishes for every matching printing, "
+        "grouped by query in the order given."
+    ),
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "queries": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "name": {"type": "string"},
+                        "set_code": {"type": "string"},
+                    },
+                    "required": ["name"],
+                },
+                "maxItems": _BATCH_MAX_QUERIES,
+            }
+        },
+        "required": ["queries"],
+    },
+}
+
 _AGENT_TABLES = ("cards", "printings", "sets")
 
 
 def _build_tools(conn: sqlite3.Connection) -> list[dict]:
     """Build tool definitions with schema DDL read from the live database."""
-    ddl_parts = []
-    for table in _AGENT_TABLES:
-        row = conn.execute(
-            "SELECT sql FROM sqlite_master WHERE type='table' AND name=?", (table,)
-        ).fetchone()
-        if row:
-            ddl_parts.append(row[0] + ";")
-    schema_ddl = "\n\n".join(ddl_parts)
+    ddl = dict(conn.execute(
+        f"SELECT name, sql FROM sqlite_master WHERE type='table' AND name IN ({','.join('?' * len(_AGENT_TABLES))})",
+        _AGENT_TABLES,
+    ).fetchall())
+    return _tools_for_schema("\n\n".join(ddl[table] + ";" for table in _AGENT_TABLES if table in ddl))
+
 
+@functools.lru_cache(maxsize=4)
+def _tools_for_schema(schema_ddl: str) -> list[dict]:
+    """Tool definitions for a schema, built once and shared by every session.
+
+    Callers must not mutate the result.
+    """
     description = (
         "Run a read-only SELECT query against the local card database.\n\n"
         f"Schema (these are the ONLY tables and columns that exist):\n\n{schema_ddl}\n\n"
@@ -252,7 +341,7 @@ def _build_tools(conn: sqlite3.Connection) -> list[dict]:
             "required": ["sql"],
         },
     }
-    return [query_tool, _ANALYZE_IMAGE_TOOL]
+    return [query_tool, _BATCH_QUERY_TOOL, _ANALYZE_IMAGE_TOOL]
 
 
 def _trace(msg: str, status_callback, trace_lines: list[str] | None = None) -> None:
@@ -261,35 +350,240 @@ def _trace(msg: str, status_callback, trace_lines: list[str] | None = None) -> N
     if status_callback:
         status_callback(msg)
     else:
-        print(msg, file=sys.stderr)
+        # One write: stderr is line-buffered, and print() would write (and
+        # flush) the message and its newline separately
+        sys.stderr.write(msg + "\n")
+
+
+def _cluster_fragments_by_x(fragments: list[dict]) -> list[list[int]]:
+    """Group fragment indices into side-by-side columns, left to right.
+
+    Fragments whose horizontal extents overlap (or sit within a median text
+    height of each other) are chained into one column. Indices within a
+    column keep their original order.
+    """
+    if not fragments:
+        return []
+    heights = sorted(f["bbox"]["h"] for f in fragments)
+    tolerance = heights[len(heights) // 2]
+
+    clusters: list[list[int]] = []
+    right = None
+    for i in sorted(range(len(fragments)), key=lambda i: fragments[i]["bbox"]["x"]):
+        b = fragments[i]["bbox"]
+        if right is None or b["x"] > right + tolerance:
+            clusters.append([])
+            right = b["x"] + b["w"]
+        clusters[-1].append(i)
+        right = max(right, b["x"] + b["w"])
+    for cluster in clusters:
+        cluster.sort()
+    return clusters
+
+
+def _bbox_iou(a: dict, b: dict) -> float:
+    """Intersection over union of two {x, y, w, h} boxes."""
+    iw = min(a["x"] + a["w"], b["x"] + b["w"]) - max(a["x"], b["x"])
+    ih = min(a["y"] + a["h"], b["y"] + b["h"]) - max(a["y"], b["y"])
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (a["w"] * a["h"] + b["w"] * b["h"] - inter)
+
+
+def _prune_and_merge_fragments(
+    fragments: list[dict], min_conf: float = 0.3, row_tol: float = 8, dup_iou: float = 0.7,
+) -> tuple[list[dict], list[list[int]]]:
+    """Compact OCR fragments into the listing sent to the agent.
+
+    When there are more than FRAGMENT_PRUNE_THRESHOLD fragments, those below
+    min_conf are dropped. Fragments with identical text whose boxes overlap
+    by more than dup_iou are collapsed into the most confident one. Within
+    each side-by-side column, fragments whose vertical centers are within
+    row_tol pixels are then merged into one left-to-right span (union bbox,
+    lowest confidence).
+
+    Returns (spans, sources) where sources[k] lists the original indices of
+    the fragments merged into spans[k].
+    """
+    if len(fragments) > FRAGMENT_PRUNE_THRESHOLD:
+        kept = [i for i, f in enumerate(fragments) if f["confidence"] >= min_conf]
+    else:
+        kept = list(range(len(fragments)))
+
+    duplicates: dict[int, list[int]] = {}
+    by_text: dict[str, list[int]] = {}
+    for i in sorted(kept, key=lambda i: -fragments[i]["confidence"]):
+        same_text = by_text.setdefault(fragments[i]["text"], [])
+        for j in same_text:
+            if _bbox_iou(fragments[i]["bbox"], fragments[j]["bbox"]) > dup_iou:
+                duplicates[j].append(i)
+                break
+        else:
+            same_text.append(i)
+            duplicates[i] = []
+    kept = sorted(duplicates)
+
+    def center_y(i: int) -> float:
+        b = fragments[i]["bbox"]
+        return b["y"] + b["h"] / 2
+
+    spans: list[dict] = []
+    sources: list[list[int]] = []
+    for column in _cluster_fragments_by_x([fragments[i] for i in kept]):
+        rows: list[tuple[float, list[int]]] = []
+        for i in sorted((kept[k] for k in column), key=center_y):
+            if rows and center_y(i) - rows[-1][0] <= row_tol:
+                rows[-1][1].append(i)
+            else:
+                rows.append((center_y(i), [i]))
+        for _, row in rows:
+            row.sort(key=lambda i: fragments[i]["bbox"]["x"])
+            sources.append(row + [d for i in row for d in duplicates[i]])
+            if len(row) == 1:
+                spans.append(fragments[row[0]])
+                continue
+            boxes = [fragments[i]["bbox"] for i in row]
+            x1 = min(b["x"] for b in boxes)
+            y1 = min(b["y"] for b in boxes)
+            spans.append({
+                "text": " ".join(fragments[i]["text"] for i in row),
+                "bbox": {
+                    "x": x1,
+                    "y": y1,
+                    "w": max(b["x"] + b["w"] for b in boxes) - x1,
+                    "h": max(b["y"] + b["h"] for b in boxes) - y1,
+                },
+                "confidence": min(fragments[i]["confidence"] for i in row),
+            })
+    return spans, sources
+
+
+def _remap_fragment_indices(cards: list[dict], sources: list[list[int]]) -> None:
+    """Rewrite each card's span indices as the original fragment indices behind them.
+
+    Indices the agent made up (outside the span listing) are dropped.
+    """
+    for card in cards:
+        card["fragment_indices"] = sorted(
+            i for k in card["fragment_indices"] if 0 <= k < len(sources) for i in sources[k]
+        )
 
 
 def _format_fragments(fragments: list[dict]) -> str:
+    clusters = _cluster_fragments_by_x(fragments)
     lines = []
-    for i, f in enumerate(fragments):
-        b = f["bbox"]
-        lines.append(
-            f'[{i}] (x={int(b["x"])},y={int(b["y"])} w={int(b["w"])},h={int(b["h"])}'
-            f' conf={f["confidence"]:.2f}): "{f["text"]}"'
-        )
+    for n, cluster in enumerate(clusters, 1):
+        if len(clusters) > 1:
+            xmin = min(fragments[i]["bbox"]["x"] for i in cluster)
+            xmax = max(fragments[i]["bbox"]["x"] + fragments[i]["bbox"]["w"] for i in cluster)
+            lines.append(f"=== GROUP {n} (x {int(xmin)}-{int(xmax)}) ===")
+        for i in cluster:
+            f = fragments[i]
+            b = f["bbox"]
+            lines.append(
+                f'[{i}] (x={int(b["x"])},y={int(b["y"])} w={int(b["w"])},h={int(b["h"])}'
+                f' conf={f["confidence"]:.2f}): "{f["text"]}"'
+            )
     return "\n".join(lines)
 
 
+# Per-connection read tuning: the agent only reads, and the card tables are
+# large enough that mmap and a bigger page cache help cold queries. WAL/journal
+# settings are deliberately left alone since they persist in the DB file.
+_AGENT_DB_PRAGMAS = (
+    "PRAGMA query_only = ON",
+    "PRAGMA mmap_size = 268435456",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA temp_store = MEMORY",
+)
+
+
+def _open_agent_db(db_path: str) -> sqlite3.Connection:
+    """Open a read-only-tuned connection for agent queries."""
+    conn = sqlite3.connect(db_path, cached_statements=256)
+    conn.row_factory = sqlite3.Row
+    for pragma in _AGENT_DB_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+# Agent connections kept per thread (a connection must not be shared across
+# threads), so sessions and pool workers reuse their page cache and statements
+_thread_dbs = threading.local()
+
+
+def _agent_db(db_path: str) -> sqlite3.Connection:
+    """This thread's agent connection to db_path, opened on first use."""
+    conns = getattr(_thread_dbs, "conns", None)
+    if conns is None:
+        conns = _thread_dbs.conns = {}
+    if db_path not in conns:
+        conns[db_path] = _open_agent_db(db_path)
+    return conns[db_path]
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) for pre-flight routing."""
+    return len(text) // 4
+
+
+# String and numeric literals, stripped to compare the shape of two queries
+_SQL_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+\b")
+
+
+def _query_shape(sql: str) -> str:
+    """SQL with literals and whitespace dropped: same tables/columns/filters, any values."""
+    return "".join(_SQL_LITERAL.sub("?", sql).upper().split())
+
+
+def _is_dead_end(result: str) -> bool:
+    """Whether a query_local_db result gave the agent nothing to work with."""
+    return result.startswith(("No results", "SQL error"))
+
+
 _DB_ROW_CAP = 200
 _DB_CHAR_CAP = 12_000
 
 
+_SELECT_RE = re.compile(r"\s*SELECT\b", re.IGNORECASE)
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+# Text just before a string literal that makes it a value, which can be bound;
+# anything else (e.g. AS 'alias', ORDER BY 'x') is left inline
+_VALUE_CONTEXT = re.compile(
+    r"(?:[=<>(,]|\|\||\b(?:LIKE|GLOB|IS|BETWEEN|AND|OR|WHEN|THEN|ELSE))\s*\Z", re.IGNORECASE,
+)
+
+
+def _parameterize(sql: str) -> tuple[str, list[str]]:
+    """Hoist value string literals out of model-written SQL into bound parameters.
+
+    Queries that differ only in the names or texts they search for then share
+    one prepared statement in the connection's statement cache. SQL with
+    comments is left as-is, since a quote inside a comment is not a literal.
+    """
+    if "--" in sql or "/*" in sql:
+        return sql, []
+    params: list[str] = []
+
+    def hoist(m: re.Match) -> str:
+        if not _VALUE_CONTEXT.search(sql, 0, m.start()):
+            return m.group()
+        params.append(m.group()[1:-1].replace("''", "'"))
+        return "?"
+
+    return _STRING_LITERAL.sub(hoist, sql), params
+
+
 def _tool_query_local_db(sql: str, conn: sqlite3.Connection) -> str:
-    sql_stripped = sql.strip()
-    if not sql_stripped.upper().startswith("SELECT"):
+    if not _SELECT_RE.match(sql):
         return "Error: only SELECT statements are permitted"
     try:
-        rows = conn.execute(sql_stripped).fetchall()
+        rows = conn.execute(*_parameterize(sql)).fetchall()
     except sqlite3.OperationalError as e:
         return f"SQL error: {e}"
     if not rows:
         return "No results found in local cache"
-    cols = rows[0].keys()
     lines = []
     total_chars = 0
     for i, row in enumerate(rows):
@@ -299,7 +593,7 @@ def _tool_query_local_db(sql: str, conn: sqlite3.Connection) -> str:
                 f"{len(rows) - _DB_ROW_CAP} rows omitted. Refine your query.]"
             )
             break
-        line = " | ".join(str(row[c]) for c in cols)
+        line = " | ".join(map(str, row))
         total_chars += len(line) + 1
         if total_chars > _DB_CHAR_CAP:
             lines.append(
@@ -311,11 +605,105 @@ def _tool_query_local_db(sql: str, conn: sqlite3.Connection) -> str:
     return "\n".join(lines)
 
 
-def _tool_analyze_image(image_path: str, client: anthropic.Anthropic) -> tuple[str, object]:
+_DB_QUERY_WORKERS = 4
+# Shared by every session; worker threads start on first use
+_DB_POOL = ThreadPoolExecutor(max_workers=_DB_QUERY_WORKERS, thread_name_prefix="agent-db")
+
+
+def _tool_query_local_db_threaded(sql: str, db_path: str) -> str:
+    """Run a query_local_db call on a _DB_POOL worker, on that worker's connection.
+
+    sqlite3 releases the GIL while a statement runs, so workers overlap.
+    """
+    return _tool_query_local_db(sql, _agent_db(db_path))
+
+
+_BATCH_COLUMNS = (
+    "printing_id", "name", "set_code", "set_name", "released_at",
+    "collector_number", "rarity", "artist", "finishes",
+)
+
+
+def _tool_query_local_db_batch(queries: list[dict], conn: sqlite3.Connection) -> str:
+    """Look up every (name, set_code?) query in a single SELECT, results grouped by query."""
+    if not isinstance(queries, list) or not queries:
+        return "Error: queries must be a non-empty list"
+    if len(queries) > _BATCH_MAX_QUERIES:
+        return f"Error: at most {_BATCH_MAX_QUERIES} queries per call, split the batch"
+    params = []
+    for i, q in enumerate(queries):
+        if not isinstance(q, dict) or not isinstance(q.get("name"), str) or not q["name"].strip():
+            return f"Error: query [{i}] needs a non-empty string name"
+        set_code = q.get("set_code")
+        if set_code is not None and not isinstance(set_code, str):
+            return f"Error: query [{i}] set_code must be a string"
+        name = q["name"].strip()
+        # Front-face pattern for double-faced cards, with the name's own
+        # LIKE wildcards escaped
+        front_face = name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + " // %"
+        params += [name, front_face, set_code.strip().lower() if set_code else None]
+    try:
+        rows = conn.execute(
+            "WITH wanted(idx, name, front_face, set_code) AS (VALUES "
+            + ",".join(f"({i},?,?,?)" for i in range(len(queries)))
+            + ") SELECT w.idx, p.printing_id, c.name, p.set_code, s.set_name, s.released_at,"
+            " p.collector_number, p.rarity, p.artist, p.finishes"
+            " FROM wanted w"
+            " JOIN cards c ON c.name = w.name COLLATE NOCASE OR c.name LIKE w.front_face ESCAPE '\\'"
+            " JOIN printings p ON p.oracle_id = c.oracle_id"
+            " AND (w.set_code IS NULL OR p.set_code = w.set_code)"
+            " LEFT JOIN sets s ON s.set_code = p.set_code"
+            " ORDER BY w.idx, s.released_at, p.collector_number",
+            params,
+        ).fetchall()
+    except sqlite3.Error as e:
+        return f"SQL error: {e}"
+
+    by_query: dict[int, list] = {}
+    for row in rows:
+        by_query.setdefault(row["idx"], []).append(row)
+
+    lines = [" | ".join(_BATCH_COLUMNS)]
+    total_rows = 0
+    total_chars = 0
+    for i, q in enumerate(queries):
+        label = f"{q['name']} ({q['set_code']})" if q.get("set_code") else q["name"]
+        lines.append(f"== [{i}] {label} ==")
+        matches = by_query.get(i)
+        if not matches:
+            lines.append("No results found in local cache")
+            continue
+        for row in matches:
+            if total_rows >= _DB_ROW_CAP or total_chars > _DB_CHAR_CAP:
+                lines.append(
+                    f"[Truncated: row cap of {_DB_ROW_CAP} or character cap of {_DB_CHAR_CAP} "
+                    f"reached. Split the batch or add set codes.]"
+                )
+                return "\n".join(lines)
+            line = " | ".join(map(str, row[1:]))
+            total_rows += 1
+            total_chars += len(line) + 1
+            lines.append(line)
+    return "\n".join(lines)
+
+
+# Encodes each session's image, and runs its analyze_image call, in the
+# background while the agent runs
+_IMAGE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-image")
+
+
+def _encode_image(image_path: str) -> tuple[str, str]:
+    """Returns (base64 image data, media type) for analyze_image."""
+    return ClaudeVision.encode_image(image_path), ClaudeVision._get_media_type(image_path)
+
+
+def _analyze_encoded_image(encoded_image: Future, client: anthropic.Anthropic) -> tuple[str, object]:
+    """_tool_analyze_image once the session's image encoding has finished."""
+    return _tool_analyze_image(*encoded_image.result(), client)
+
+
+def _tool_analyze_image(image_data: str, media_type: str, client: anthropic.Anthropic) -> tuple[str, object]:
     """Returns (description_text, response.usage)."""
-    vision = ClaudeVision(model=VISION_MODEL)
-    image_data = vision.encode_image(image_path)
-    media_type = vision._get_media_type(image_path)
 
     response = client.messages.create(
         model=VISION_MODEL,
@@ -371,15 +759,106 @@ def _tool_analyze_image(image_path: str, client: anthropic.Anthropic) -> tuple[s
     return text, response.usage
 
 
-def _has_tool_use(response) -> bool:
-    return any(block.type == "tool_use" for block in response.content)
+def _matches_output_schema(result) -> bool:
+    """Check a decoded answer against OUTPUT_SCHEMA (types, required and allowed keys)."""
+    if not isinstance(result, dict) or result.keys() != {"cards"} or not isinstance(result["cards"], list):
+        return False
+    for card in result["cards"]:
+        if not isinstance(card, dict) or not card.keys() >= {"name", "printing_ids", "fragment_indices"}:
+            return False
+        if not card.keys() <= {"name", "printing_ids", "fragment_indices", "notes"}:
+            return False
+        if not isinstance(card["name"], str) or not isinstance(card.get("notes", ""), str):
+            return False
+        if not isinstance(card["printing_ids"], list) or not all(isinstance(p, str) for p in card["printing_ids"]):
+            return False
+        if not isinstance(card["fragment_indices"], list) or not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in card["fragment_indices"]
+        ):
+            return False
+    return True
+
+
+def _response_text(response) -> str:
+    """All text blocks of a response, joined."""
+    return "".join(block.text for block in response.content if block.type == "text").strip()
+
+
+def _end_turn_answer(response) -> dict | None:
+    """Return the end_turn reply if it is already a non-empty OUTPUT_SCHEMA answer."""
+    text = _response_text(response)
+    if not text.startswith("{"):
+        return None
+    try:
+        result = json.loads(text)
+    except json.JSONDecodeError:
+        return None
+    if not _matches_output_schema(result) or not result["cards"]:
+        return None
+    return result
+
+
+def _compact_tool_results(messages: list[dict], keep_recent: int = 2) -> int:
+    """Replace DB results older than the last keep_recent tool turns with a stub.
+
+    The tool_use/tool_result pairing is kept, only the result text shrinks.
+    analyze_image results are kept since that tool cannot be called again.
+    Returns the number of results cleared by this call.
+    """
+    vision_ids = {
+        block.id
+        for message in messages
+        if message["role"] == "assistant"
+        for block in message["content"]
+        if block.type == "tool_use" and block.name == "analyze_image"
+    }
+    result_turns = [
+        message for message in messages
+        if message["role"] == "user" and isinstance(message["content"], list)
+        and any(block.get("type") == "tool_result" for block in message["content"])
+    ]
+    cleared = 0
+    for message in result_turns[:-keep_recent]:
+        for block in message["content"]:
+            if (
+                block.get("type") != "tool_result"
+                or block["tool_use_id"] in vision_ids
+                or block["content"].startswith("[Cleared")
+            ):
+                continue
+            lines = block["content"].count("\n") + 1
+            block["content"] = f"[Cleared to save context: this result had {lines} lines. Repeat the call if needed.]"
+            cleared += 1
+    return cleared
+
+
+def _stream_message(client: anthropic.Anthropic, on_block, **kwargs):
+    """messages.create over the streaming API, calling on_block(block) as each content block completes."""
+    with client.messages.stream(**kwargs) as stream:
+        for event in stream:
+            if event.type == "content_block_stop":
+                on_block(event.content_block)
+        return stream.get_final_message()
+
+
+def _accumulate_usage(bucket: dict[str, int], response_usage) -> None:
+    """Add one response's token counts to a usage bucket.
+
+    The cache counters are None when caching was not involved (and missing
+    on older SDKs).
+    """
+    bucket["input"] += response_usage.input_tokens
+    bucket["output"] += response_usage.output_tokens
+    bucket["cache_read"] += getattr(response_usage, "cache_read_input_tokens", None) or 0
+    bucket["cache_creation"] += getattr(response_usage, "cache_creation_input_tokens", None) or 0
 
 
 def _call_api(fn, status_callback, trace_lines=None, **kwargs):
     """Call fn(**kwargs) with retries on 529 Overloaded and 429 Rate Limit errors.
 
     On 429: switches Haiku->Sonnet immediately (per-model rate limit), waits on Sonnet.
-    On 529: after 3 Haiku failures switches to Sonnet for remaining retries.
+    On 529: after 3 Haiku failures switches to Sonnet for remaining retries;
+    waits honour retry-after, else back off from 1.5s with ±25% jitter.
     """
     haiku_529_count = 0
     for attempt in range(6):
@@ -405,13 +884,170 @@ def _call_api(fn, status_callback, trace_lines=None, **kwargs):
                 if haiku_529_count >= 3 and kwargs.get("model") == AGENT_MODEL_HAIKU:
                     kwargs["model"] = AGENT_MODEL_SONNET
                     _trace("[AGENT] Switching to Sonnet after 3 Haiku overload errors", status_callback, trace_lines)
-                wait = 3 * (2 ** attempt)
-                _trace(f"[AGENT] Overloaded (529), retrying in {wait}s...", status_callback, trace_lines)
+                # Server hint first; otherwise 1.5s doubling, jittered ±25% so
+                # concurrent ingest workers don't retry in lockstep
+                retry_after = e.response.headers.get("retry-after")
+                wait = float(retry_after) if retry_after else 1.5 * (2 ** attempt) * random.uniform(0.75, 1.25)
+                _trace(f"[AGENT] Overloaded (529), retrying in {wait:.1f}s...", status_callback, trace_lines)
                 time.sleep(wait)
             else:
                 raise
 
 
+def _session_cacheable(ocr_fragments: list[dict]) -> bool:
+    """True if the OCR text alone is distinctive enough to stand for the card.
+
+    Sparse OCR (a copyright line, a lone collector number) is shared by many
+    different cards, and those sessions lean on analyze_image anyway.
+    """
+    if len(ocr_fragments) < SPECULATIVE_VISION_THRESHOLD:
+        return False
+    texts = {f["text"].strip().lower() for f in ocr_fragments}
+    return sum(ch.isalnum() for text in texts for ch in text) >= SESSION_CACHE_MIN_CHARS
+
+
+def _fragments_fingerprint(ocr_fragments: list[dict], set_hint: str | None) -> str:
+    """Stable key for an OCR result: texts and positions on a 10px grid."""
+    key = [set_hint, [(f["text"], round(f["bbox"]["x"] / 10), round(f["bbox"]["y"] / 10)) for f in ocr_fragments]]
+    return hashlib.blake2b(json.dumps(key).encode(), digest_size=16).hexdigest()
+
+
+# (image_path, answer) of finished sessions keyed by _fragments_fingerprint,
+# oldest first. Re-photographing a card on the capture stand gives the same
+# OCR, and the same OCR gets the same answer, so those sessions make no API
+# calls. Only sessions with _session_cacheable OCR that did not use
+# analyze_image are stored. A rerun on the very same image is a deliberate
+# retry and is not answered from here.
+_session_cache: OrderedDict[str, tuple[str, str]] = OrderedDict()
+_session_cache_lock = threading.Lock()
+
+
+def _cached_session(fingerprint: str, image_path: str) -> list[dict] | None:
+    with _session_cache_lock:
+        entry = _session_cache.get(fingerprint)
+        if entry is None or entry[0] == image_path:
+            return None
+        _session_cache.move_to_end(fingerprint)
+    return json.loads(entry[1])
+
+
+def _remember_session(fingerprint: str, image_path: str, cards: list[dict]) -> None:
+    with _session_cache_lock:
+        _session_cache[fingerprint] = (image_path, json.dumps(cards))
+        _session_cache.move_to_end(fingerprint)
+        if len(_session_cache) > SESSION_CACHE_SIZE:
+            _session_cache.popitem(last=False)
+
+
+@dataclass
+class _SessionStart:
+    """Everything a session's first request is built from."""
+
+    initial_block: dict
+    system_content: list[dict]
+    model: str
+    estimated_tokens: int
+    span_sources: list[list[int]]
+
+
+def _session_start(image_path: str, ocr_fragments: list[dict], set_hint: str | None, tools: list[dict]) -> _SessionStart:
+    """Build the opening prompt for an image and pick the model it starts on."""
+    spans, span_sources = _prune_and_merge_fragments(ocr_fragments)
+    initial_content = (
+        f"I have run OCR on the image `{image_path}`. "
+        f"Here are the {len(spans)} text fragments found:\n\n"
+        + _format_fragments(spans)
+        + "\n\nPlease identify the MTG card in this image."
+    )
+    if set_hint:
+        initial_content += (
+            f"\n\nIMPORTANT: The user has indicated this card is from set '{set_hint}'. "
+            f"When querying the database, ALWAYS filter by this set code first "
+            f"(e.g. WHERE p.set_code = '{set_hint.lower()}'). "
+            f"Only consider other sets if the card does not exist in '{set_hint}'."
+        )
+    system_content = _system_content(ocr_fragments)
+
+    # Sessions start on Haiku unless the first prompt is already near the
+    # context threshold (with headroom, since this is only an estimate);
+    # otherwise Haiku is only replaced once it stalls or context grows
+    estimated = (
+        sum(_estimate_tokens(block["text"]) for block in system_content)
+        + _estimate_tokens(json.dumps(tools))
+        + _estimate_tokens(initial_content)
+    )
+    model = AGENT_MODEL_SONNET if estimated > CONTEXT_UPGRADE_THRESHOLD * 0.8 else AGENT_MODEL_HAIKU
+
+    return _SessionStart(
+        # The OCR listing is static for the whole session: a breakpoint here
+        # caches system + tools + fragments for every later turn (tools are
+        # cached via the marker on the last tool, analyze_image).
+        initial_block={"type": "text", "text": initial_content, "cache_control": {"type": "ephemeral"}},
+        system_content=system_content,
+        model=model,
+        estimated_tokens=estimated,
+        span_sources=span_sources,
+    )
+
+
+BATCH_POLL_SECONDS = 30
+
+
+def run_agent_batch(
+    images: list[tuple[str, list[dict]]],
+    status_callback=None,
+) -> list[tuple[list[dict], list[str], dict]]:
+    """Identify many images, sending every session's first turn as one Message Batch.
+
+    The first turn carries the whole OCR listing and is the largest request of
+    a session; batching it halves its price. Batches can take minutes to
+    finish, so this is for offline bulk work. Each session then continues on
+    the regular API via run_agent.
+
+    Args:
+        images: (image_path, ocr_fragments) pairs.
+        status_callback: Optional callable for trace messages (replaces stderr).
+
+    Returns:
+        One (cards, trace, usage) tuple per image, in input order.
+    """
+    client = get_client()
+    tools = _build_tools(_agent_db(get_db_path()))
+
+    requests = []
+    for i, (image_path, ocr_fragments) in enumerate(images):
+        start = _session_start(image_path, ocr_fragments, None, tools)
+        requests.append({
+            "custom_id": str(i),
+            "params": {
+                "model": start.model,
+                "max_tokens": AGENT_TURN_MAX_TOKENS,
+                "temperature": 0,
+                "system": start.system_content,
+                "tools": tools,
+                "messages": [{"role": "user", "content": [start.initial_block]}],
+            },
+        })
+
+    batch = client.messages.batches.create(requests=requests)
+    _trace(f"[BATCH] Submitted {len(requests)} first turns as {batch.id}", status_callback)
+    while batch.processing_status != "ended":
+        time.sleep(BATCH_POLL_SECONDS)
+        batch = client.messages.batches.retrieve(batch.id)
+
+    first_responses = {}
+    for entry in client.messages.batches.results(batch.id):
+        if entry.result.type != "succeeded":
+            raise RuntimeError(f"Batch {batch.id} request {entry.custom_id} {entry.result.type}")
+        first_responses[int(entry.custom_id)] = entry.result.message
+    _trace(f"[BATCH] {batch.id} ended, continuing {len(first_responses)} sessions", status_callback)
+
+    return [
+        run_agent(image_path, ocr_fragments, status_callback=status_callback, first_response=first_responses[i])
+        for i, (image_path, ocr_fragments) in enumerate(images)
+    ]
+
+
 def run_agent(
     image_path: str,
     ocr_fragments: list[dict],
@@ -419,9 +1055,14 @@ def run_agent(
     status_callback=None,
     trace_out: list[str] | None = None,
     set_hint: str | None = None,
+    first_response=None,
 ) -> tuple[list[dict], list[str], dict]:
     """Run the tool-using agent to identify MTG cards from an image.
 
+    A different image whose OCR matches an earlier session's (same texts at
+    the same positions, same set_hint) gets that session's answer back with
+    zero usage and no API calls.
+
     Args:
         image_path: Path to the card image file.
         ocr_fragments: Pre-computed OCR fragments from run_ocr_with_boxes().
@@ -433,6 +1074,9 @@ def run_agent(
                    is raised.
         set_hint: Optional set code or name provided by the user. When present,
                   the agent should strongly prefer printings from this set.
+        first_response: Optional reply to the session's first request, already
+                  obtained elsewhere (run_agent_batch); the first turn then
+                  makes no API call.
 
     Returns:
         (cards, trace, usage) where cards is a list of card dicts, trace is the
@@ -442,14 +1086,6 @@ def run_agent(
     n = len(ocr_fragments)
     if max_calls is None:
         max_calls = max(DEFAULT_MAX_CALLS, int(DEFAULT_MAX_CALLS * n / 10))
-    agent_model = AGENT_MODEL_SONNET if n > LARGE_FRAGMENT_THRESHOLD else AGENT_MODEL_HAIKU
-
-    client = anthropic.Anthropic(
-        timeout=httpx.Timeout(600.0, connect=10.0),
-    )
-    conn = sqlite3.connect(get_db_path())
-    conn.row_factory = sqlite3.Row
-    tools = _build_tools(conn)
 
     trace_lines: list[str] = trace_out if trace_out is not None else []
     usage: dict[str, dict[str, int]] = {
@@ -458,47 +1094,101 @@ def run_agent(
         "opus": {"input": 0, "output": 0, "cache_read": 0, "cache_creation": 0},
     }
 
-    _trace(f"[AGENT] Starting with {n} OCR fragments (max_calls={max_calls}, model={agent_model})", status_callback, trace_lines)
+    fingerprint = _fragments_fingerprint(ocr_fragments, set_hint) if _session_cacheable(ocr_fragments) else None
+    cards = _cached_session(fingerprint, image_path) if fingerprint else None
+    if cards is not None:
+        _trace(f"[AGENT] Same {n} OCR fragments as an earlier session, reusing its answer", status_callback, trace_lines)
+        _trace(f"[FINAL OUTPUT]\n{json.dumps({'cards': cards}, indent=2)}", status_callback, trace_lines)
+        return cards, trace_lines, usage
 
-    initial_content = (
-        f"I have run OCR on the image `{image_path}`. "
-        f"Here are the {len(ocr_fragments)} text fragments found:\n\n"
-        + _format_fragments(ocr_fragments)
-        + "\n\nPlease identify the MTG card in this image."
+    client = get_client()
+    db_path = get_db_path()
+    conn = _agent_db(db_path)
+    tools = _build_tools(conn)
+    # Ready by the time analyze_image is called; errors surface there
+    encoded_image = _IMAGE_POOL.submit(_encode_image, image_path)
+
+    start = _session_start(image_path, ocr_fragments, set_hint, tools)
+    span_sources = start.span_sources
+    agent_model = start.model
+    _trace(
+        f"[AGENT] Starting with {n} OCR fragments as {len(span_sources)} spans "
+        f"(max_calls={max_calls}, model={agent_model})",
+        status_callback,
+        trace_lines,
     )
-    if set_hint:
-        initial_content += (
-            f"\n\nIMPORTANT: The user has indicated this card is from set '{set_hint}'. "
-            f"When querying the database, ALWAYS filter by this set code first "
-            f"(e.g. WHERE p.set_code = '{set_hint.lower()}'). "
-            f"Only consider other sets if the card does not exist in '{set_hint}'."
-        )
-    messages = [{"role": "user", "content": initial_content}]
+    if agent_model != AGENT_MODEL_HAIKU:
+        _trace(f"[AGENT] Prompt estimated at {start.estimated_tokens} tokens, starting on Sonnet", status_callback, trace_lines)
+
+    initial_block = start.initial_block
+    messages = [{"role": "user", "content": [initial_block]}]
+    # Rolling breakpoints on the newest user turns. System and tools hold two
+    # of the API's four breakpoints, so only the two most recent tails keep
+    # theirs: the previous one is read from cache, the newest one written.
+    tail_blocks = [initial_block]
+    system_content = start.system_content
 
     tool_call_count = 0
     vision_used = [False]
     vision_cached_result = [None]
+    # The session's one analyze_image call, started as soon as its tool_use
+    # block completes so Opus runs alongside the rest of the turn
+    vision_future: list[Future] = []
+    # query_local_db results keyed by SQL text; the DB does not change mid-session
+    sql_cache: dict[str, str] = {}
+    # query_local_db calls started while the turn is still streaming, keyed by
+    # SQL text, so the queries run concurrently with each other and the model
+    in_flight: dict[str, Future] = {}
+
+    def prefetch(block) -> None:
+        if block.type != "tool_use":
+            return
+        if block.name == "query_local_db":
+            sql = block.input.get("sql", "").strip()
+            if sql not in sql_cache and sql not in in_flight:
+                in_flight[sql] = _DB_POOL.submit(_tool_query_local_db_threaded, sql, db_path)
+        elif block.name == "analyze_image" and not vision_future:
+            vision_future.append(_IMAGE_POOL.submit(_analyze_encoded_image, encoded_image, client))
+
+    if n < SPECULATIVE_VISION_THRESHOLD:
+        # With next to no OCR text the agent ends up asking for analyze_image
+        # after a round trip or two; start it now so the answer is waiting
+        _trace(f"[AGENT] Only {n} OCR fragments, starting analyze_image speculatively", status_callback, trace_lines)
+        vision_future.append(_IMAGE_POOL.submit(_analyze_encoded_image, encoded_image, client))
+
+    # Dead-end queries that repeat the shape of an earlier query, since the
+    # last query that returned rows
+    query_shapes: set[str] = set()
+    no_progress = 0
     nudge_sent = False
     response = None
+    # Prompt size at which old results are next cleared: the first turn's
+    # prompt (system, tools, OCR listing) plus HISTORY_COMPACT_THRESHOLD of
+    # history, then the same growth again after each clearing
+    compact_at = None
 
     while tool_call_count < max_calls:
-        response = _call_api(
-            client.messages.create,
-            status_callback,
-            trace_lines=trace_lines,
-            model=agent_model,
-            max_tokens=4000,
-            temperature=0,
-            system=SYSTEM_CONTENT,
-            tools=tools,
-            messages=messages,
-        )
+        if first_response is not None:
+            response, first_response = first_response, None
+            for block in response.content:
+                prefetch(block)
+        else:
+            response = _call_api(
+                _stream_message,
+                status_callback,
+                trace_lines=trace_lines,
+                client=client,
+                on_block=prefetch,
+                model=agent_model,
+                max_tokens=AGENT_TURN_MAX_TOKENS,
+                temperature=0,
+                system=system_content,
+                tools=tools,
+                messages=messages,
+            )
 
         model_key = "sonnet" if "sonnet" in response.model else "haiku"
-        usage[model_key]["input"] += response.usage.input_tokens
-        usage[model_key]["output"] += response.usage.output_tokens
-        usage[model_key]["cache_read"] += getattr(response.usage, "cache_read_input_tokens", 0) or 0
-        usage[model_key]["cache_creation"] += getattr(response.usage, "cache_creation_input_tokens", 0) or 0
+        _accumulate_usage(usage[model_key], response.usage)
 
         # Persist model upgrade if _call_api switched due to rate limit/overload
         if agent_model == AGENT_MODEL_HAIKU and model_key == "sonnet":
@@ -506,11 +1196,13 @@ def run_agent(
             _trace("[AGENT] Persisting upgrade to Sonnet", status_callback, trace_lines)
 
         model_label = model_key
+        tool_blocks = []
         for block in response.content:
             if block.type == "text":
                 _trace(f"[AGENT/{model_label}] {block.text.strip()}", status_callback, trace_lines)
             elif block.type == "tool_use":
                 _trace(f"[TOOL CALL/{model_label}] {block.name}: {json.dumps(block.input)}", status_callback, trace_lines)
+                tool_blocks.append(block)
 
         if (
             agent_model == AGENT_MODEL_HAIKU
@@ -523,29 +1215,41 @@ def run_agent(
                 trace_lines,
             )
 
-        if response.stop_reason == "end_turn" or not _has_tool_use(response):
+        if response.stop_reason == "end_turn" or not tool_blocks:
             break
 
         tool_results = []
-        for block in response.content:
-            if block.type != "tool_use":
-                continue
-
+        for block in tool_blocks:
             tool_call_count += 1
             name = block.name
             inputs = block.input
 
             if name == "query_local_db":
-                result = _tool_query_local_db(inputs.get("sql", ""), conn)
+                sql = inputs.get("sql", "").strip()
+                if sql in in_flight:
+                    sql_cache[sql] = in_flight.pop(sql).result()
+                elif sql not in sql_cache:
+                    sql_cache[sql] = _tool_query_local_db(sql, conn)
+                else:
+                    _trace("[TOOL] query_local_db: [cached] same SQL as an earlier call", status_callback, trace_lines)
+                result = sql_cache[sql]
+                shape = _query_shape(sql)
+                if not _is_dead_end(result):
+                    no_progress = 0
+                elif shape in query_shapes:
+                    no_progress += 1
+                query_shapes.add(shape)
+            elif name == "query_local_db_batch":
+                result = _tool_query_local_db_batch(inputs.get("queries", []), conn)
             elif name == "analyze_image":
                 if vision_used[0]:
                     result = vision_cached_result[0] or (
                         "[analyze_image already called — use query_local_db instead.]"
                     )
                 else:
-                    result, vision_usage = _tool_analyze_image(image_path, client)
-                    usage["opus"]["input"] += vision_usage.input_tokens
-                    usage["opus"]["output"] += vision_usage.output_tokens
+                    prefetch(block)
+                    result, vision_usage = vision_future[0].result()
+                    _accumulate_usage(usage["opus"], vision_usage)
                     vision_used[0] = True
                     vision_cached_result[0] = result
             else:
@@ -570,6 +1274,14 @@ def run_agent(
 
         messages.append({"role": "assistant", "content": response.content})
 
+        if agent_model == AGENT_MODEL_HAIKU and no_progress >= NO_PROGRESS_UPGRADE_THRESHOLD:
+            agent_model = AGENT_MODEL_SONNET
+            _trace(
+                f"[AGENT] {no_progress} repeated dead-end queries, upgrading to Sonnet",
+                status_callback,
+                trace_lines,
+            )
+
         # Nudge the agent if it's struggling
         if tool_call_count >= 6 and not vision_used[0] and not nudge_sent:
             nudge = (
@@ -580,19 +1292,116 @@ def run_agent(
             nudge_sent = True
             _trace(f"[AGENT] Injected nudge at {tool_call_count} tool calls", status_callback, trace_lines)
 
+        tool_results[-1]["cache_control"] = {"type": "ephemeral"}
+        tail_blocks.append(tool_results[-1])
+        if len(tail_blocks) > 2:
+            del tail_blocks.pop(0)["cache_control"]
+
         messages.append({"role": "user", "content": tool_results})
 
+        # Keep the resent history from growing with every turn. Repeated
+        # queries are answered from sql_cache, so clearing costs no DB work.
+        context_tokens = (
+            response.usage.input_tokens
+            + (getattr(response.usage, "cache_read_input_tokens", None) or 0)
+            + (getattr(response.usage, "cache_creation_input_tokens", None) or 0)
+        )
+        # Clearing rewrites the cached history, so it happens in rare large
+        # steps rather than a result or two every turn
+        if compact_at is None:
+            compact_at = context_tokens + HISTORY_COMPACT_THRESHOLD
+        elif context_tokens >= compact_at:
+            cleared = _compact_tool_results(messages)
+            compact_at = context_tokens + HISTORY_COMPACT_THRESHOLD
+            if cleared:
+                _trace(f"[AGENT] Context at {context_tokens} tokens, cleared {cleared} older tool results", status_callback, trace_lines)
+
     _trace(f"[FINAL] Tool calls used: {tool_call_count}/{max_calls}", status_callback, trace_lines)
 
+    # The agent is asked to end with the JSON answer; when it did, that reply
+    # is the result and the structured-output round trip is skipped.
+    result = None
+    if response is not None and response.stop_reason == "end_turn":
+        result = _end_turn_answer(response)
+        if result is not None:
+            _trace("[FINAL] end_turn reply matches the output schema, skipping final call", status_callback, trace_lines)
+
+    if result is None:
+        result = _request_final_answer(
+            client, agent_model, system_content, tools, messages, response, usage, status_callback, trace_lines,
+        )
+
+    if vision_future and not vision_used[0]:
+        # The answer is ready, so a speculative analyze_image the agent never
+        # asked for is not waited on. Its usage is counted only if it already
+        # finished; its failure cannot affect the result.
+        future = vision_future[0]
+        if future.cancel():
+            _trace("[AGENT] Speculative analyze_image went unused, cancelled before it started", status_callback, trace_lines)
+        elif not future.done():
+            _trace("[AGENT] Speculative analyze_image went unused, still running (usage not counted)", status_callback, trace_lines)
+        else:
+            try:
+                _, vision_usage = future.result()
+            except Exception as e:
+                _trace(f"[AGENT] Speculative analyze_image went unused and failed: {e}", status_callback, trace_lines)
+            else:
+                _accumulate_usage(usage["opus"], vision_usage)
+                _trace("[AGENT] Speculative analyze_image went unused", status_callback, trace_lines)
+
+    # The agent indexed the merged spans; report indices into ocr_fragments
+    _remap_fragment_indices(result["cards"], span_sources)
+
+    cache_read_total = sum(u["cache_read"] for u in usage.values())
+    cache_creation_total = sum(u["cache_creation"] for u in usage.values())
+    _trace(
+        f"[USAGE] haiku={usage['haiku']['input']}in/{usage['haiku']['output']}out "
+        f"sonnet={usage['sonnet']['input']}in/{usage['sonnet']['output']}out "
+        f"opus={usage['opus']['input']}in/{usage['opus']['output']}out "
+        f"cache_read={cache_read_total} cache_creation={cache_creation_total}",
+        status_callback,
+        trace_lines,
+    )
+    if not cache_read_total and not cache_creation_total:
+        # Breakpoints are silently ignored below a model's minimum cacheable
+        # prefix, so make a session that never touched the cache visible
+        _trace(
+            "[USAGE] No prompt-cache reads or writes this session (prefix below the cacheable minimum?)",
+            status_callback,
+            trace_lines,
+        )
+
+    # An answer that used analyze_image rests on the picture, not just the OCR
+    if fingerprint and not vision_used[0]:
+        _remember_session(fingerprint, image_path, result["cards"])
+    _trace(f"[FINAL OUTPUT]\n{json.dumps(result, indent=2)}", status_callback, trace_lines)
+    return result["cards"], trace_lines, usage
+
+
+def _request_final_answer(
+    client, agent_model, system_content, tools, messages, response, usage, status_callback, trace_lines,
+) -> dict:
+    """Ask for the final answer with a json_schema structured-output call."""
     FINAL_PROMPT = (
         "Output ALL IDENTIFIED CANDIDATES for the card now. "
         "Each card entry must include a printing_ids array with ALL plausible "
         "printing_id values from the database, most likely first. "
         "Include the card name for reference. "
     )
-    # If the last response was end_turn it hasn't been appended to messages yet.
-    # Add it so the conversation is complete, then ask for the final answer.
-    if response is not None and response.stop_reason == "end_turn":
+    # If the last response ended the loop (end_turn, or an answer cut off at
+    # AGENT_TURN_MAX_TOKENS) it hasn't been appended to messages yet. Add it
+    # so the conversation is complete and a partial answer can be finished,
+    # then ask for the final answer.
+    # A cut-off turn that still made tool calls was already appended by the loop.
+    truncated = (
+        response is not None
+        and response.stop_reason == "max_tokens"
+        and response.content
+        and not any(block.type == "tool_use" for block in response.content)
+    )
+    if truncated:
+        _trace("[FINAL] Last turn hit max_tokens, keeping its partial answer", status_callback, trace_lines)
+    if truncated or (response is not None and response.stop_reason == "end_turn"):
         messages.append({"role": "assistant", "content": response.content})
     # Both paths get the same final prompt.
     messages.append({"role": "user", "content": FINAL_PROMPT})
@@ -605,7 +1414,11 @@ def run_agent(
         model=agent_model,
         max_tokens=2000,
         temperature=0,
-        system=SYSTEM_CONTENT,
+        system=system_content,
+        # Same tools as the loop so the tools + system prefix is read from
+        # cache; tool_choice none keeps this turn to the JSON answer
+        tools=tools,
+        tool_choice={"type": "none"},
         messages=messages,
         output_config={
             "format": {
@@ -615,22 +1428,13 @@ def run_agent(
         },
     )
     final_model_key = "sonnet" if "sonnet" in final_response.model else "haiku"
-    usage[final_model_key]["input"] += final_response.usage.input_tokens
-    usage[final_model_key]["output"] += final_response.usage.output_tokens
-    usage[final_model_key]["cache_read"] += getattr(final_response.usage, "cache_read_input_tokens", 0) or 0
-    usage[final_model_key]["cache_creation"] += getattr(final_response.usage, "cache_creation_input_tokens", 0) or 0
-
-    cache_read_total = sum(u["cache_read"] for u in usage.values())
-    cache_creation_total = sum(u["cache_creation"] for u in usage.values())
-    _trace(
-        f"[USAGE] haiku={usage['haiku']['input']}in/{usage['haiku']['output']}out "
-        f"sonnet={usage['sonnet']['input']}in/{usage['sonnet']['output']}out "
-        f"opus={usage['opus']['input']}in/{usage['opus']['output']}out "
-        f"cache_read={cache_read_total} cache_creation={cache_creation_total}",
-        status_callback,
-        trace_lines,
-    )
-
-    result = json.loads(final_response.content[0].text)
-    _trace(f"[FINAL OUTPUT]\n{json.dumps(result, indent=2)}", status_callback, trace_lines)
-    return result["cards"], trace_lines, usage
+    _accumulate_usage(usage[final_model_key], final_response.usage)
+
+    text = _response_text(final_response)
+    result = json.loads(text)
+    if not _matches_output_schema(result):
+        raise ValueError(
+            f"Final answer does not match OUTPUT_SCHEMA "
+            f"(stop_reason={final_response.stop_reason}): {text[:500]}"
+        )
+    return result
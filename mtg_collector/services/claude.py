@@ -1,51 +1,227 @@
 """Claude Vision API interface for reading card corner info."""
 
 import base64
+import functools
+import hashlib
 import json
+import os
+import random
+import re
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List
 
 import anthropic
 import httpx
 
+# Longest edge the vision models use; larger images are downscaled by the API
+MAX_IMAGE_EDGE = 1568
 
-class ClaudeVision:
-    """Interface to Claude API for card image analysis."""
+_RESAMPLE_FORMATS = {"PNG", "GIF", "WEBP"}
 
-    def __init__(self, model: str = "claude-opus-4-6", max_retries: int = 4):
-        self.client = anthropic.Anthropic(
+
+@functools.lru_cache(maxsize=8)
+def _encode_image_file(image_path: str, mtime_ns: int, size: int) -> str:
+    """Base64 for ClaudeVision.encode_image, memoized per file version (path, mtime, size)."""
+    import io
+
+    from PIL import Image, ImageOps
+
+    # Base64 inflates by 4/3, so raw limit is 5MB * 3/4 = 3.75MB
+    MAX_RAW = 5 * 1024 * 1024 * 3 // 4
+
+    img = Image.open(image_path)
+    if max(img.size) > MAX_IMAGE_EDGE:
+        # Phone photos are ~4000px; the API would shrink them to this size
+        # anyway, so do it before upload and send a fraction of the bytes.
+        # Same container format, so _get_media_type still matches.
+        fmt = img.format if img.format in _RESAMPLE_FORMATS else "JPEG"
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((MAX_IMAGE_EDGE, MAX_IMAGE_EDGE), Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format=fmt, quality=85)
+        data = buf.getvalue()
+    else:
+        with open(image_path, "rb") as f:
+            data = f.read()
+
+    if len(data) <= MAX_RAW:
+        return base64.b64encode(data).decode("utf-8")
+
+    print(f"  Compressing image ({len(data)/1024/1024:.1f}MB raw, ~{len(data)*4/3/1024/1024:.1f}MB base64)...")
+    quality = 85
+    while quality >= 30:
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality)
+        if buf.tell() <= MAX_RAW:
+            print(f"  Compressed to {buf.tell()/1024/1024:.1f}MB (quality={quality})")
+            return base64.b64encode(buf.getvalue()).decode("utf-8")
+        quality -= 10
+
+    # Last resort: scale down
+    img.thumbnail((img.width // 2, img.height // 2), Image.LANCZOS)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=60)
+    print(f"  Scaled down to {buf.tell()/1024/1024:.1f}MB")
+    return base64.b64encode(buf.getvalue()).decode("utf-8")
+
+
+_client: anthropic.Anthropic | None = None
+
+
+def get_client() -> anthropic.Anthropic:
+    """The process-wide API client; ClaudeVision and the agent share its connection pool."""
+    global _client
+    if _client is None:
+        _client = anthropic.Anthropic(
             timeout=httpx.Timeout(600.0, connect=10.0),
+            # httpx drops idle connections after 5s, less than the gap between
+            # one image's session and the next; keep them for a minute so the
+            # TLS connection is reused rather than re-established per image
+            http_client=anthropic.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=1000, max_keepalive_connections=100, keepalive_expiry=60.0),
+            ),
         )
-        self.model = model
-        self.max_retries = max_retries
+    return _client
 
-    def extract_cards_from_ocr(
-        self,
-        ocr_texts: List[str],
-        hints: Dict = None,
-    ) -> List[Dict]:
-        """
-        Extract structured card data from raw OCR text using a cheap text-only Claude call.
 
-        Args:
-            ocr_texts: List of text fragments from EasyOCR
-            hints: Optional dict with 'set' and/or 'color' to help disambiguation
+_JSON_DECODER = json.JSONDecoder()
 
-        Returns:
-            List of dicts with card fields (name, set_code, collector_number, etc.)
-        """
-        hints = hints or {}
-        hint_lines = []
-        if hints.get("set"):
-            hint_lines.append(f"- All cards are from set: {hints['set'].upper()}")
-        if hints.get("color"):
-            hint_lines.append(f"- All cards have color identity: {hints['color'].upper()}")
-        hint_block = "\n".join(hint_lines) if hint_lines else "None"
+RETRY_BASE_SECONDS = 1.0
+RETRY_CAP_SECONDS = 60.0
+
+
+def _retry_wait(prev_wait: float, error: Exception | None) -> float:
+    """Seconds to wait before retrying after error.
+
+    Uses the server's retry-after header when the error carries one, else
+    decorrelated jitter: random between RETRY_BASE_SECONDS and three times
+    the previous wait, capped at RETRY_CAP_SECONDS. Parallel callers that
+    failed together then spread out instead of retrying in lockstep.
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        return float(retry_after)
+    return min(RETRY_CAP_SECONDS, random.uniform(RETRY_BASE_SECONDS, prev_wait * 3))
+
+
+# read_card_corners results keyed by a hash of the image bytes, oldest first.
+# A re-uploaded or re-scanned photo with identical bytes is answered without
+# encoding it or calling the API. Stored as JSON so callers can mutate theirs.
+CORNER_CACHE_SIZE = 256
+_corner_cache: OrderedDict[str, str] = OrderedDict()
+_corner_cache_lock = threading.Lock()
+
+
+def _image_digest(image_path: str) -> str:
+    with open(image_path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+# Photos whose darkest and brightest pixels are closer than this are blank
+# (lens cap, empty scanner bed, overexposed frame): no corners to read
+BLANK_IMAGE_RANGE = 16
+
+
+def _is_blank_image(image_path: str) -> bool:
+    """True if the image is a single flat tone, checked on a small draft decode."""
+    from PIL import Image
+
+    img = Image.open(image_path)
+    # JPEGs decode at 1/8 scale here, so the check costs a few milliseconds
+    img.draft("L", (256, 256))
+    lo, hi = img.convert("L").getextrema()
+    return hi - lo < BLANK_IMAGE_RANGE
+
+
+# read_card_corners asks this cheaper model first and only sends the image
+# to ClaudeVision.model when its reading fails _corners_look_complete
+CORNER_SCOUT_MODEL = "claude-haiku-4-5-20251001"
+
+_CORNER_RARITIES = frozenset("CURMPLTF")
+_CORNER_NUMBER_RE = re.compile(r"\d{3,4}")
+
+
+def _corners_look_complete(result: tuple) -> bool:
+    """True if a (normalized, skipped) reading found cards and every field has the printed shape."""
+    normalized, skipped = result
+    if not normalized or skipped:
+        return False
+    return all(
+        card["rarity"] in _CORNER_RARITIES
+        and _CORNER_NUMBER_RE.fullmatch(card["collector_number"])
+        and len(card["set"]) == 3
+        for card in normalized
+    )
 
-        ocr_blob = "\n".join(ocr_texts)
 
-        prompt = f"""Below is raw OCR text extracted from a photo of one or more Magic: The Gathering card(s).
+def _cached_corners(digest: str):
+    with _corner_cache_lock:
+        result = _corner_cache.get(digest)
+        if result is None:
+            return None
+        _corner_cache.move_to_end(digest)
+    return tuple(json.loads(result))
+
+
+def _remember_corners(digest: str, result: tuple) -> None:
+    with _corner_cache_lock:
+        _corner_cache[digest] = json.dumps(result)
+        _corner_cache.move_to_end(digest)
+        if len(_corner_cache) > CORNER_CACHE_SIZE:
+            _corner_cache.popitem(last=False)
+
+
+# extract_cards_from_ocr results keyed by _ocr_digest, oldest first. Several
+# photos of the same card OCR to the same fragments; only the first is sent.
+OCR_CACHE_SIZE = 256
+_ocr_cache: OrderedDict[str, str] = OrderedDict()
+_ocr_cache_lock = threading.Lock()
+
+
+def _ocr_digest(ocr_texts: List[str], expected_count, hints: Dict) -> str:
+    """Hash of the OCR fragments (stripped, lowercased, in any order) and the request options."""
+    h = hashlib.blake2b(digest_size=16)
+    for text in sorted(t.strip().lower() for t in ocr_texts):
+        h.update(text.encode())
+        h.update(b"\n")
+    h.update(json.dumps([expected_count, hints], sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def _cached_extraction(digest: str):
+    with _ocr_cache_lock:
+        cards = _ocr_cache.get(digest)
+        if cards is None:
+            return None
+        _ocr_cache.move_to_end(digest)
+    return json.loads(cards)
+
+
+def _remember_extraction(digest: str, cards: List[Dict]) -> None:
+    with _ocr_cache_lock:
+        _ocr_cache[digest] = json.dumps(cards)
+        _ocr_cache.move_to_end(digest)
+        if len(_ocr_cache) > OCR_CACHE_SIZE:
+            _ocr_cache.popitem(last=False)
+
+
+# Fixed instructions for each call, sent as the system prompt with a cache
+# breakpoint; the user turn carries only the per-photo image, hints and OCR
+# text, so the instructions form a stable prefix for the prompt cache.
+# Output token budgets. The API counts max_tokens against the output rate
+# limit up front, so asking for far more than a reply needs throttles
+# parallel callers for nothing. A full OCR card object (with rules text)
+# is ~250 tokens; a corner object is ~25.
+OCR_TOKENS_PER_CARD = 400
+CORNER_MAX_TOKENS = 1024
+CORNER_MAX_TOKENS_RETRY = 4000
+
+_OCR_INSTRUCTIONS = """The user message holds raw OCR text extracted from a photo of one or more Magic: The Gathering card(s).
 The OCR is noisy — text may be misspelled, fragmented, or out of order.
 
 Your job: identify each card and extract whatever fields you can confidently read.
@@ -64,14 +240,11 @@ Collector numbers — the printed format has changed over Magic's history:
     If you see fewer than 4 digits from a 4-digit-era card, the OCR is truncated — omit it.
   - Some cards across all eras have letter suffixes (a, b, s, z) or prefixes (A-) for variants.
 
-Known hints:
-{hint_block}
-
 Return a JSON array with one object per card you can identify. Each object should include
 only the fields you can confidently identify from the OCR text:
 
 - "name": card name (string)
-- "mana_cost": mana cost like "{{2}}{{R}}" (string)
+- "mana_cost": mana cost like "{2}{R}" (string)
 - "mana_value": converted mana cost (integer)
 - "type": one of the valid card types listed above (string)
 - "subtype": creature subtype like "Insect Horror" (string)
@@ -85,57 +258,266 @@ only the fields you can confidently identify from the OCR text:
 Omit any field you are not confident about. Do NOT guess or hallucinate.
 If a hint provides the set code, include "set_code" in every card object.
 
-Return ONLY the JSON array, no other text.
+Return ONLY the JSON array, no other text."""
 
-OCR TEXT:
-{ocr_blob}"""
+_OCR_POSITIONS_INSTRUCTIONS = """The user message lists numbered OCR text fragments extracted from a photo of one or more Magic: The Gathering cards.
+Each fragment has a position (x, y, w, h) showing where it appeared in the image.
+The OCR is noisy — text may be misspelled, fragmented, or out of order.
 
-        last_error = None
-        for attempt in range(self.max_retries + 1):
-            try:
-                if attempt > 0:
-                    wait_time = 3 * (2 ** (attempt - 1))
-                    print(f"  Retrying in {wait_time}s (attempt {attempt + 1}/{self.max_retries + 1})...")
-                    time.sleep(wait_time)
+Your job: figure out how many cards are present and extract data for each one.
 
-                response = self.client.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=4000,
-                    messages=[{"role": "user", "content": prompt}],
-                )
+CARD LAYOUT (top to bottom):
+  - Title (top of card)
+  - Type and Subtype (middle, below the art)
+  - Rules text (below type line — may be blank on vanilla creatures)
+  - Flavor text (italic, below rules — optional)
+  - Bottom-left corner: collector number, set code, artist name
+  - Bottom-right corner: power/toughness (creatures only)
 
-                text_content = ""
-                for block in response.content:
-                    if block.type == "text":
-                        text_content += block.text
+There will be large vertical gaps between the title and the type line — that is the card art.
+Cards with no rules text will have another gap between the type line and the collector info.
+All of these text regions belong to the SAME card. Do NOT split them into separate cards.
 
-                if not text_content.strip():
-                    raise ValueError("Empty response from Claude")
+If the photo contains multiple cards side by side, use horizontal position (x coordinates)
+to determine which fragments belong to which card.
 
-                cards = self._parse_json_response(text_content)
+FIELD GUIDELINES:
 
-                if not isinstance(cards, list):
-                    raise ValueError(f"Expected JSON array, got {type(cards)}")
+Card types — the ONLY valid card types in Magic are:
+  Artifact, Creature, Enchantment, Instant, Land, Planeswalker, Sorcery, Battle, Tribal
+Anything else is NOT a type — it is a card name, subtype, or rules text.
+
+Collector numbers — the printed format has changed over Magic's history:
+  - Pre-1998 (before Exodus): NO collector number printed on card at all.
+  - 1998–2014 (Exodus through M15): printed as "CN/TOTAL" (e.g., "10/250"), 1-3 digit CN.
+  - 2015–2023 (M15 frame through Phyrexia): CN on its own line, 1-3 digits, no leading zeros.
+  - 2023+ (March of the Machine onward): exactly 4 digits with leading zeros (e.g., 0092, 0161).
+    If you see fewer than 4 digits from a 4-digit-era card, the OCR is truncated — omit it.
+  - Some cards across all eras have letter suffixes (a, b, s, z) or prefixes (A-) for variants.
 
+Return one object per card. Each object should consolidate ALL fragments from that card.
+Only return cards you can actually identify from the OCR text. Do NOT return empty or
+placeholder objects. Every card must have a non-empty fragment_indices array.
+Include only fields you can confidently identify. Always include fragment_indices.
+Omit any field you are not confident about. Do NOT guess or hallucinate.
+If a hint provides the set code, include "set_code" in every card object."""
+
+
+# Structured-output schema for extract_cards_from_ocr_with_positions
+_OCR_POSITIONS_CARD_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "name": {"type": "string"},
+        "mana_cost": {"type": "string"},
+        "mana_value": {"type": "integer"},
+        "type": {"type": "string"},
+        "subtype": {"type": "string"},
+        "rules_text": {"type": "string"},
+        "collector_number": {"type": "string"},
+        "set_code": {"type": "string"},
+        "artist": {"type": "string"},
+        "power": {"type": "integer"},
+        "toughness": {"type": "integer"},
+        "fragment_indices": {
+            "type": "array",
+            "items": {"type": "integer"},
+        },
+    },
+    "required": ["fragment_indices"],
+    "additionalProperties": False,
+}
+
+_OCR_POSITIONS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "cards": {
+            "type": "array",
+            "items": _OCR_POSITIONS_CARD_SCHEMA,
+        },
+    },
+    "required": ["cards"],
+    "additionalProperties": False,
+}
+
+_CORNER_INSTRUCTIONS = """The image you are given shows the bottom-left corners of Magic: The Gathering cards.
+
+Each corner has TWO LINES of tiny printed text:
+  LINE 1:  RARITY  COLLECTOR_NUMBER   (optional text after — ignore it)
+  LINE 2:  SET · EN   or   SET ★ EN
+
+CRITICAL: The set code is on LINE 2, directly before the separator (· or ★). It is always 3 characters. Any text on line 1 after the collector number is NOT the set code — ignore it.
+
+Where:
+- RARITY: a single letter — C, U, R, M, P, L (land), T (token), or F (Jumpstart face card)
+- COLLECTOR_NUMBER: 3-4 digits with leading zeros (e.g. 0075, 0200)
+- SET: exactly 3 letters on line 2, before · or ★ (e.g. FIN, EOE, MKM)
+- Dot (·) = nonfoil, star (★) = foil
+
+For EACH card corner, return rarity, collector_number, set (from line 2), and foil status.
+
+Return ONLY a JSON array:
+[{"rarity": "C", "collector_number": "0075", "set": "EOE", "foil": false}, ...]"""
+
+
+class ClaudeVision:
+    """Interface to Claude API for card image analysis."""
+
+    def __init__(self, model: str = "claude-opus-4-6", max_retries: int = 4):
+        self.client = get_client()
+        self.model = model
+        self.max_retries = max_retries
+
+    def extract_cards_from_ocr(
+        self,
+        ocr_texts: List[str],
+        expected_count: int = None,
+        hints: Dict = None,
+    ) -> tuple:
+        """
+        Extract structured card data from raw OCR text using a cheap text-only Claude call.
+
+        Args:
+            ocr_texts: List of text fragments from EasyOCR
+            expected_count: Number of cards in the photo, if known; sizes max_tokens
+            hints: Optional dict with 'set' and/or 'color' to help disambiguation
+
+        Returns:
+            Tuple of (cards, usage) where cards is a list of dicts with card
+            fields (name, set_code, collector_number, etc.) and usage is the
+            response's token usage, or ([], None) if the call failed
+        """
+        hints = hints or {}
+        digest = _ocr_digest(ocr_texts, expected_count, hints)
+        cached = _cached_extraction(digest)
+        if cached is not None:
+            print(f"  Same OCR text as an earlier extraction, reusing its {len(cached)} card(s)")
+            return cached, anthropic.types.Usage(input_tokens=0, output_tokens=0)
+
+        params = self._ocr_request(ocr_texts, expected_count, hints)
+
+        last_error = None
+        last_exc = None
+        wait_time = RETRY_BASE_SECONDS
+        for attempt in range(self.max_retries + 1):
+            try:
+                if attempt > 0:
+                    wait_time = _retry_wait(wait_time, last_exc)
+                    print(f"  Retrying in {wait_time:.1f}s (attempt {attempt + 1}/{self.max_retries + 1})...")
+                    time.sleep(wait_time)
+
+                response = self.client.messages.create(**params)
+                cards = self._parse_card_list(response.content)
+                _remember_extraction(digest, cards)
                 return cards, response.usage
 
             except json.JSONDecodeError as e:
                 last_error = f"JSON parse error: {e}"
+                last_exc = e
                 print(f"  {last_error}")
             except anthropic.BadRequestError as e:
                 error_msg = str(e)
                 if "credit balance" in error_msg.lower() or "billing" in error_msg.lower():
                     raise RuntimeError("Anthropic API credit balance too low. Add credits at console.anthropic.com.") from e
                 print(f"  Error: {e}")
-                return []
+                return [], None
             except Exception as e:
                 last_error = str(e)
+                last_exc = e
                 if "api_key" in str(e).lower() or "authentication" in str(e).lower():
                     raise RuntimeError(f"Anthropic API authentication error: {e}") from e
                 print(f"  Error: {e}")
 
         print(f"  Failed after {self.max_retries + 1} attempts. Last error: {last_error}")
-        return []
+        return [], None
+
+    def _ocr_request(self, ocr_texts: List[str], expected_count: int, hints: Dict) -> Dict:
+        """messages.create parameters for extracting the cards in one photo's OCR text."""
+        hint_lines = []
+        if hints.get("set"):
+            hint_lines.append(f"- All cards are from set: {hints['set'].upper()}")
+        if hints.get("color"):
+            hint_lines.append(f"- All cards have color identity: {hints['color'].upper()}")
+        hint_block = "\n".join(hint_lines) if hint_lines else "None"
+
+        ocr_blob = "\n".join(ocr_texts)
+
+        return {
+            "model": "claude-sonnet-4-5-20250929",
+            "max_tokens": OCR_TOKENS_PER_CARD * expected_count + 256 if expected_count else 4000,
+            "system": [{"type": "text", "text": _OCR_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": f"Known hints:\n{hint_block}\n\nOCR TEXT:\n{ocr_blob}"}],
+        }
+
+    def _parse_card_list(self, content) -> List[Dict]:
+        """Parse an extraction reply into its list of card dicts."""
+        text_content = ""
+        for block in content:
+            if block.type == "text":
+                text_content += block.text
+
+        if not text_content.strip():
+            raise ValueError("Empty response from Claude")
+
+        cards = self._parse_json_response(text_content)
+
+        if not isinstance(cards, list):
+            raise ValueError(f"Expected JSON array, got {type(cards)}")
+        return cards
+
+    def extract_cards_from_ocr_batch(
+        self,
+        ocr_text_lists: List[List[str]],
+        expected_counts: List[int] = None,
+        hints: Dict = None,
+        poll_seconds: int = 30,
+    ) -> List[List[Dict]]:
+        """
+        Run extract_cards_from_ocr over several photos' OCR text as one Message Batch.
+
+        Half the price of one call per photo, for bulk ingests that are not
+        waited on interactively; see read_card_corners_batch. Photos whose
+        OCR text was already extracted, or repeats an earlier photo in the
+        same batch, are not submitted.
+
+        Args:
+            ocr_text_lists: One list of OCR fragments per photo
+            expected_counts: Cards in each photo, if known; sizes max_tokens
+            hints: Optional dict with 'set' and/or 'color', shared by all photos
+
+        Returns:
+            One list of card dicts per photo, in ocr_text_lists order
+        """
+        hints = hints or {}
+        expected_counts = expected_counts or [None] * len(ocr_text_lists)
+        digests = [
+            _ocr_digest(ocr_texts, count, hints)
+            for ocr_texts, count in zip(ocr_text_lists, expected_counts)
+        ]
+        cached = {i: _cached_extraction(digest) for i, digest in enumerate(digests)}
+        # Identical OCR text in one batch is submitted once
+        first_index = {}
+        for i, digest in enumerate(digests):
+            first_index.setdefault(digest, i)
+        requests = [
+            {"custom_id": str(i), "params": self._ocr_request(ocr_texts, count, hints)}
+            for i, (ocr_texts, count) in enumerate(zip(ocr_text_lists, expected_counts))
+            if cached[i] is None and first_index[digests[i]] == i
+        ]
+        labels = [f"photo {i + 1}" for i in range(len(ocr_text_lists))]
+        results = self._run_batch(requests, poll_seconds, labels) if requests else {}
+
+        out = []
+        for i, digest in enumerate(digests):
+            if cached[i] is None and first_index[digest] != i:
+                # A copy, as the cache would hand out
+                cached[i] = json.loads(json.dumps(out[first_index[digest]]))
+            if cached[i] is not None:
+                out.append(cached[i])
+                continue
+            cards = self._parse_card_list(results[i].content)
+            _remember_extraction(digest, cards)
+            out.append(cards)
+        return out
 
     def extract_cards_from_ocr_with_positions(
         self,
@@ -166,76 +548,7 @@ OCR TEXT:
             )
         frag_blob = "\n".join(frag_lines)
 
-        prompt = f"""Below are numbered OCR text fragments extracted from a photo of one or more Magic: The Gathering cards.
-Each fragment has a position (x, y, w, h) showing where it appeared in the image.
-The OCR is noisy — text may be misspelled, fragmented, or out of order.
-
-Your job: figure out how many cards are present and extract data for each one.
-
-CARD LAYOUT (top to bottom):
-  - Title (top of card)
-  - Type and Subtype (middle, below the art)
-  - Rules text (below type line — may be blank on vanilla creatures)
-  - Flavor text (italic, below rules — optional)
-  - Bottom-left corner: collector number, set code, artist name
-  - Bottom-right corner: power/toughness (creatures only)
-
-There will be large vertical gaps between the title and the type line — that is the card art.
-Cards with no rules text will have another gap between the type line and the collector info.
-All of these text regions belong to the SAME card. Do NOT split them into separate cards.
-
-If the photo contains multiple cards side by side, use horizontal position (x coordinates)
-to determine which fragments belong to which card.
-
-FIELD GUIDELINES:
-
-Card types — the ONLY valid card types in Magic are:
-  Artifact, Creature, Enchantment, Instant, Land, Planeswalker, Sorcery, Battle, Tribal
-Anything else is NOT a type — it is a card name, subtype, or rules text.
-
-Collector numbers — the printed format has changed over Magic's history:
-  - Pre-1998 (before Exodus): NO collector number printed on card at all.
-  - 1998–2014 (Exodus through M15): printed as "CN/TOTAL" (e.g., "10/250"), 1-3 digit CN.
-  - 2015–2023 (M15 frame through Phyrexia): CN on its own line, 1-3 digits, no leading zeros.
-  - 2023+ (March of the Machine onward): exactly 4 digits with leading zeros (e.g., 0092, 0161).
-    If you see fewer than 4 digits from a 4-digit-era card, the OCR is truncated — omit it.
-  - Some cards across all eras have letter suffixes (a, b, s, z) or prefixes (A-) for variants.
-
-Known hints:
-{hint_block}
-
-Return one object per card. Each object should consolidate ALL fragments from that card.
-Only return cards you can actually identify from the OCR text. Do NOT return empty or
-placeholder objects. Every card must have a non-empty fragment_indices array.
-Include only fields you can confidently identify. Always include fragment_indices.
-Omit any field you are not confident about. Do NOT guess or hallucinate.
-If a hint provides the set code, include "set_code" in every card object.
-
-OCR FRAGMENTS:
-{frag_blob}"""
-
-        card_schema = {
-            "type": "object",
-            "properties": {
-                "name": {"type": "string"},
-                "mana_cost": {"type": "string"},
-                "mana_value": {"type": "integer"},
-                "type": {"type": "string"},
-                "subtype": {"type": "string"},
-                "rules_text": {"type": "string"},
-                "collector_number": {"type": "string"},
-                "set_code": {"type": "string"},
-                "artist": {"type": "string"},
-                "power": {"type": "integer"},
-                "toughness": {"type": "integer"},
-                "fragment_indices": {
-                    "type": "array",
-                    "items": {"type": "integer"},
-                },
-            },
-            "required": ["fragment_indices"],
-            "additionalProperties": False,
-        }
+        prompt = f"Known hints:\n{hint_block}\n\nOCR FRAGMENTS:\n{frag_blob}"
 
         def _status(msg):
             if status_callback:
@@ -244,33 +557,26 @@ OCR FRAGMENTS:
         _status(f"Sending {len(fragments)} fragments to Claude...")
 
         last_error = None
+        last_exc = None
+        wait_time = RETRY_BASE_SECONDS
         for attempt in range(self.max_retries + 1):
             try:
                 if attempt > 0:
-                    wait_time = 3 * (2 ** (attempt - 1))
-                    _status(f"Retry {attempt + 1}/{self.max_retries + 1} in {wait_time}s...")
-                    print(f"  Retrying in {wait_time}s (attempt {attempt + 1}/{self.max_retries + 1})...")
+                    wait_time = _retry_wait(wait_time, last_exc)
+                    _status(f"Retry {attempt + 1}/{self.max_retries + 1} in {wait_time:.1f}s...")
+                    print(f"  Retrying in {wait_time:.1f}s (attempt {attempt + 1}/{self.max_retries + 1})...")
                     time.sleep(wait_time)
 
                 _status(f"Waiting for Claude... (attempt {attempt + 1}/{self.max_retries + 1})")
                 response = self.client.messages.create(
                     model="claude-sonnet-4-5-20250929",
                     max_tokens=4000,
+                    system=[{"type": "text", "text": _OCR_POSITIONS_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}],
                     messages=[{"role": "user", "content": prompt}],
                     output_config={
                         "format": {
                             "type": "json_schema",
-                            "schema": {
-                                "type": "object",
-                                "properties": {
-                                    "cards": {
-                                        "type": "array",
-                                        "items": card_schema,
-                                    },
-                                },
-                                "required": ["cards"],
-                                "additionalProperties": False,
-                            },
+                            "schema": _OCR_POSITIONS_SCHEMA,
                         },
                     },
                 )
@@ -293,6 +599,7 @@ OCR FRAGMENTS:
                 return [], None
             except Exception as e:
                 last_error = str(e)
+                last_exc = e
                 if "api_key" in str(e).lower() or "authentication" in str(e).lower():
                     raise RuntimeError(f"Anthropic API authentication error: {e}") from e
                 print(f"  Error: {e}")
@@ -300,84 +607,41 @@ OCR FRAGMENTS:
         print(f"  Failed after {self.max_retries + 1} attempts. Last error: {last_error}")
         return [], None
 
-    def encode_image(self, image_path: str) -> str:
-        """Encode image to base64, compressing if base64 would exceed 5MB."""
-        # Base64 inflates by 4/3, so raw limit is 5MB * 3/4 = 3.75MB
-        MAX_RAW = 5 * 1024 * 1024 * 3 // 4
-
-        with open(image_path, "rb") as f:
-            data = f.read()
-
-        if len(data) <= MAX_RAW:
-            return base64.b64encode(data).decode("utf-8")
-
-        import io
-
-        from PIL import Image
-
-        print(f"  Compressing image ({len(data)/1024/1024:.1f}MB raw, ~{len(data)*4/3/1024/1024:.1f}MB base64)...")
-        img = Image.open(image_path)
-        quality = 85
-        while quality >= 30:
-            buf = io.BytesIO()
-            img.save(buf, format="JPEG", quality=quality)
-            if buf.tell() <= MAX_RAW:
-                print(f"  Compressed to {buf.tell()/1024/1024:.1f}MB (quality={quality})")
-                return base64.b64encode(buf.getvalue()).decode("utf-8")
-            quality -= 10
-
-        # Last resort: scale down
-        img.thumbnail((img.width // 2, img.height // 2), Image.LANCZOS)
-        buf = io.BytesIO()
-        img.save(buf, format="JPEG", quality=60)
-        print(f"  Scaled down to {buf.tell()/1024/1024:.1f}MB")
-        return base64.b64encode(buf.getvalue()).decode("utf-8")
-
-    def _get_media_type(self, image_path: str) -> str:
+    @staticmethod
+    def encode_image(image_path: str) -> str:
+        """Encode image to base64, downscaled to MAX_IMAGE_EDGE and compressed if base64 would exceed 5MB."""
+        # The same photo is often sent more than once (agent vision call,
+        # corner reads, retries); only re-encode when the file changes
+        st = os.stat(image_path)
+        return _encode_image_file(image_path, st.st_mtime_ns, st.st_size)
+
+    _MEDIA_TYPE_MAP = {
+        ".jpg": "image/jpeg",
+        ".jpeg": "image/jpeg",
+        ".png": "image/png",
+        ".webp": "image/webp",
+    }
+
+    @staticmethod
+    def _get_media_type(image_path: str) -> str:
         """Determine media type from file extension."""
-        ext = Path(image_path).suffix.lower()
-        media_type_map = {
-            ".jpg": "image/jpeg",
-            ".jpeg": "image/jpeg",
-            ".png": "image/png",
-            ".webp": "image/webp",
-        }
-        return media_type_map.get(ext, "image/jpeg")
+        return ClaudeVision._MEDIA_TYPE_MAP.get(Path(image_path).suffix.lower(), "image/jpeg")
 
     def _parse_json_response(self, text: str) -> any:
-        """Parse JSON from Claude response, handling markdown fences and preamble text."""
-        text = text.strip()
-
-        # Handle markdown code fences
-        if text.startswith("```"):
-            lines = text.split("\n")
-            text = "\n".join(lines[1:-1])
-
-        # Try direct parse first
-        try:
-            return json.loads(text)
-        except json.JSONDecodeError:
-            pass
-
-        # Look for JSON array in the text
-        start = text.find("[")
-        end = text.rfind("]")
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(text[start:end + 1])
-            except json.JSONDecodeError:
-                pass
+        """Parse JSON from Claude response, handling markdown fences and preamble text.
 
-        # Look for JSON object in the text
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
+        Decodes the first complete JSON value that starts at the earliest
+        "[" or "{", ignoring anything before or after it, so each candidate
+        is scanned once instead of re-parsing slices of the text.
+        """
+        starts = sorted(i for i in (text.find("["), text.find("{")) if i != -1)
+        for start in starts:
             try:
-                return json.loads(text[start:end + 1])
+                return _JSON_DECODER.raw_decode(text, start)[0]
             except json.JSONDecodeError:
                 pass
 
-        # If all else fails, raise the original error
+        # No JSON value found: raise the decode error for the whole reply
         return json.loads(text)
 
     def read_card_corners(self, image_path: str) -> List[Dict]:
@@ -389,6 +653,10 @@ OCR FRAGMENTS:
             EOE · EN    (nonfoil — dot separator)
             EOE ★ EN    (foil — star separator)
 
+        CORNER_SCOUT_MODEL reads the image first; self.model is only asked
+        when that request fails or its reading is empty or has a field that
+        doesn't look printed.
+
         Args:
             image_path: Path to the image showing card corners
 
@@ -399,115 +667,230 @@ OCR FRAGMENTS:
         """
         print(f"Reading card corners from: {image_path}")
 
-        media_type = self._get_media_type(image_path)
-        image_data = self.encode_image(image_path)
-
+        digest = _image_digest(image_path)
+        cached = _cached_corners(digest)
+        if cached is not None:
+            print(f"  Same image as an earlier read, reusing its {len(cached[0])} card corner(s)")
+            return cached
+
+        if _is_blank_image(image_path):
+            print("  Image is blank, no card corners to read")
+            return [], []
+
+        params = self._corner_request(image_path)
+        models = [self.model] if self.model == CORNER_SCOUT_MODEL else [CORNER_SCOUT_MODEL, self.model]
+        scout_result = None
+        for model in models:
+            result = self._request_corners({**params, "model": model})
+            if model == self.model:
+                break
+            if result is None:
+                print(f"  {model} request failed, asking {self.model}")
+            elif _corners_look_complete(result):
+                break
+            else:
+                scout_result = result
+                print(f"  {model} reading looks incomplete, asking {self.model}")
+
+        if result is None:
+            if scout_result is not None:
+                # Better than nothing, but not cached: a later read may do better
+                print(f"  Using the incomplete {CORNER_SCOUT_MODEL} reading")
+                return scout_result
+            return [], []
+        _remember_corners(digest, result)
+        return result
+
+    def _request_corners(self, params: Dict):
+        """Send one corner-reading request with retries; the (normalized, skipped) reply, or None on failure."""
+        # A raised max_tokens stays with this request's retries, not the caller's params
+        params = dict(params)
         last_error = None
+        last_exc = None
+        wait_time = RETRY_BASE_SECONDS
         for attempt in range(self.max_retries + 1):
             try:
                 if attempt > 0:
-                    wait_time = 3 * (2 ** (attempt - 1))
-                    print(f"  Retrying in {wait_time}s (attempt {attempt + 1}/{self.max_retries + 1})...")
+                    wait_time = _retry_wait(wait_time, last_exc)
+                    print(f"  Retrying in {wait_time:.1f}s (attempt {attempt + 1}/{self.max_retries + 1})...")
                     time.sleep(wait_time)
 
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=4000,
-                    messages=[
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": media_type,
-                                        "data": image_data,
-                                    },
-                                },
-                                {
-                                    "type": "text",
-                                    "text": """This image shows the bottom-left corners of Magic: The Gathering cards.
-
-Each corner has TWO LINES of tiny printed text:
-  LINE 1:  RARITY  COLLECTOR_NUMBER   (optional text after — ignore it)
-  LINE 2:  SET · EN   or   SET ★ EN
-
-CRITICAL: The set code is on LINE 2, directly before the separator (· or ★). It is always 3 characters. Any text on line 1 after the collector number is NOT the set code — ignore it.
-
-Where:
-- RARITY: a single letter — C, U, R, M, P, L (land), T (token), or F (Jumpstart face card)
-- COLLECTOR_NUMBER: 3-4 digits with leading zeros (e.g. 0075, 0200)
-- SET: exactly 3 letters on line 2, before · or ★ (e.g. FIN, EOE, MKM)
-- Dot (·) = nonfoil, star (★) = foil
-
-For EACH card corner, return rarity, collector_number, set (from line 2), and foil status.
-
-Return ONLY a JSON array:
-[{"rarity": "C", "collector_number": "0075", "set": "EOE", "foil": false}, ...]""",
-                                },
-                            ],
-                        }
-                    ],
-                )
-
-                text_content = ""
-                for block in response.content:
-                    if block.type == "text":
-                        text_content += block.text
-
-                if not text_content.strip():
-                    raise ValueError("Empty response from Claude")
-
-                cards = self._parse_json_response(text_content)
-
-                if not isinstance(cards, list):
-                    raise ValueError(f"Expected JSON array, got {type(cards)}")
-
-                # Normalize
-                normalized = []
-                skipped = []
-                for card in cards:
-                    if not isinstance(card, dict):
-                        continue
-                    rarity = card.get("rarity", "").strip().upper()
-                    cn = card.get("collector_number", "").strip()
-                    set_code = card.get("set", "").strip()
-                    foil = bool(card.get("foil", False))
-
-                    if not cn or not set_code:
-                        skipped.append(card)
-                        continue
-
-                    normalized.append({
-                        "rarity": rarity,
-                        "collector_number": cn,
-                        "set": set_code,
-                        "foil": foil,
-                    })
-
-                if skipped:
-                    print(f"  Warning: {len(skipped)} card(s) incomplete (missing set or collector number):")
-                    for s in skipped:
-                        fields = {k: v for k, v in s.items() if v}
-                        print(f"    {fields}")
-                print(f"  Found {len(normalized)} card corner(s)")
-                return normalized, skipped
+                response = self.client.messages.create(**params)
+                if response.stop_reason == "max_tokens" and params["max_tokens"] < CORNER_MAX_TOKENS_RETRY:
+                    print("  Reply was cut off, asking again with room for more cards")
+                    params["max_tokens"] = CORNER_MAX_TOKENS_RETRY
+                    response = self.client.messages.create(**params)
+                return self._normalize_corners(response.content)
 
             except json.JSONDecodeError as e:
                 last_error = f"JSON parse error: {e}"
+                last_exc = e
                 print(f"  {last_error}")
             except anthropic.BadRequestError as e:
                 error_msg = str(e)
                 if "credit balance" in error_msg.lower() or "billing" in error_msg.lower():
                     raise RuntimeError("Anthropic API credit balance too low. Add credits at console.anthropic.com.") from e
                 print(f"  Error: {e}")
-                return [], []
+                return None
             except Exception as e:
                 last_error = str(e)
+                last_exc = e
                 if "api_key" in str(e).lower() or "authentication" in str(e).lower():
                     raise RuntimeError(f"Anthropic API authentication error: {e}") from e
                 print(f"  Error: {e}")
 
         print(f"  Failed after {self.max_retries + 1} attempts. Last error: {last_error}")
-        return [], []
+        return None
+
+    def _corner_request(self, image_path: str) -> Dict:
+        """messages.create parameters for reading the corners in one image."""
+        return {
+            "model": self.model,
+            "max_tokens": CORNER_MAX_TOKENS,
+            "system": [{"type": "text", "text": _CORNER_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}],
+            "messages": [
+                {
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": self._get_media_type(image_path),
+                                "data": self.encode_image(image_path),
+                            },
+                        },
+                        {"type": "text", "text": "Read the card corners in this image."},
+                    ],
+                }
+            ],
+        }
+
+    def _normalize_corners(self, content) -> tuple:
+        """Parse a corner-reading reply into (normalized, skipped) card lists."""
+        text_content = ""
+        for block in content:
+            if block.type == "text":
+                text_content += block.text
+
+        if not text_content.strip():
+            raise ValueError("Empty response from Claude")
+
+        cards = self._parse_json_response(text_content)
+
+        if not isinstance(cards, list):
+            raise ValueError(f"Expected JSON array, got {type(cards)}")
+
+        # Normalize
+        normalized = []
+        skipped = []
+        for card in cards:
+            if not isinstance(card, dict):
+                continue
+            rarity = card.get("rarity", "").strip().upper()
+            cn = card.get("collector_number", "").strip()
+            set_code = card.get("set", "").strip()
+            foil = bool(card.get("foil", False))
+
+            if not cn or not set_code:
+                skipped.append(card)
+                continue
+
+            normalized.append({
+                "rarity": rarity,
+                "collector_number": cn,
+                "set": set_code,
+                "foil": foil,
+            })
+
+        if skipped:
+            print(f"  Warning: {len(skipped)} card(s) incomplete (missing set or collector number):")
+            for s in skipped:
+                fields = {k: v for k, v in s.items() if v}
+                print(f"    {fields}")
+        print(f"  Found {len(normalized)} card corner(s)")
+        return normalized, skipped
+
+    def read_card_corners_batch(self, image_paths: List[str], poll_seconds: int = 30) -> List[tuple]:
+        """
+        Run read_card_corners over several images as one Message Batch.
+
+        Batched requests cost half as much but can take minutes (up to a day)
+        to finish, so this is for bulk scans that are not waited on
+        interactively. A request that does not succeed raises; there is no
+        per-image retry as in read_card_corners. Images already in the corner
+        cache, and blank ones, are answered without being submitted.
+
+        Returns:
+            One (normalized, skipped) tuple per image, in image_paths order
+        """
+        digests = [_image_digest(image_path) for image_path in image_paths]
+        cached = {i: _cached_corners(digest) for i, digest in enumerate(digests)}
+        blank = {
+            i for i, image_path in enumerate(image_paths)
+            if cached[i] is None and _is_blank_image(image_path)
+        }
+        # Byte-identical images in one batch are submitted once
+        first_index = {}
+        for i, digest in enumerate(digests):
+            first_index.setdefault(digest, i)
+        requests = [
+            # No second round to retry a cut-off reply, so leave room up front
+            {"custom_id": str(i), "params": {**self._corner_request(image_path), "max_tokens": CORNER_MAX_TOKENS_RETRY}}
+            for i, image_path in enumerate(image_paths)
+            if cached[i] is None and i not in blank and first_index[digests[i]] == i
+        ]
+        results = self._run_batch(requests, poll_seconds, image_paths) if requests else {}
+
+        out = []
+        for i, image_path in enumerate(image_paths):
+            print(f"Card corners from: {image_path}")
+            if cached[i] is None and first_index[digests[i]] != i:
+                # A copy, as the cache would hand out
+                cached[i] = tuple(json.loads(json.dumps(out[first_index[digests[i]]])))
+            if cached[i] is not None:
+                print(f"  Same image as an earlier read, reusing its {len(cached[i][0])} card corner(s)")
+                out.append(cached[i])
+                continue
+            if i in blank:
+                print("  Image is blank, no card corners to read")
+                out.append(([], []))
+                continue
+            result = self._normalize_corners(results[i].content)
+            _remember_corners(digests[i], result)
+            out.append(result)
+        return out
+
+    def _run_batch(self, requests: List[Dict], poll_seconds: int, labels: List[str]) -> Dict:
+        """Submit requests as one Message Batch; return reply messages by custom_id index.
+
+        labels[i] names the input behind custom_id i in error messages.
+        """
+        batch = self.client.messages.batches.create(requests=requests)
+        print(f"Submitted {len(requests)} request(s) as batch {batch.id}, waiting for results...")
+        while batch.processing_status != "ended":
+            time.sleep(poll_seconds)
+            batch = self.client.messages.batches.retrieve(batch.id)
+
+        results = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type != "succeeded":
+                raise RuntimeError(f"Batch {batch.id} request for {labels[int(entry.custom_id)]}: {entry.result.type}")
+            results[int(entry.custom_id)] = entry.result.message
+        return results
+
+    def read_card_corners_many(self, image_paths: List[str], max_workers: int = 4) -> List[tuple]:
+        """
+        Run read_card_corners over several images with up to max_workers calls in flight.
+
+        Each image is an independent API round trip, so a multi-photo scan
+        takes about as long as its slowest few photos rather than their sum.
+
+        Returns:
+            One (normalized, skipped) tuple per image, in image_paths order
+        """
+        if len(image_paths) < 2:
+            return [self.read_card_corners(image_path) for image_path in image_paths]
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(image_paths))) as ex:
+            return list(ex.map(self.read_card_corners, image_paths))
@@ -38,38 +38,46 @@ def to_json_array(value: Optional[list]) -> Optional[str]:
     return json.dumps(value)
 
 
+# Canonical conditions plus common abbreviations, keyed by upper-cased input
+_CONDITION_LOOKUP = {
+    **{c.upper(): c for c in (
+        "Near Mint", "Lightly Played", "Moderately Played", "Heavily Played", "Damaged",
+    )},
+    "NM": "Near Mint",
+    "LP": "Lightly Played",
+    "MP": "Moderately Played",
+    "HP": "Heavily Played",
+    "D": "Damaged",
+    "DM": "Damaged",
+    "DMG": "Damaged",
+    "PL": "Lightly Played",
+    "SP": "Lightly Played",  # Slightly Played -> Lightly Played
+    "EX": "Lightly Played",  # Excellent -> Lightly Played
+    "GD": "Lightly Played",  # Good -> Lightly Played
+    "VG": "Lightly Played",  # Very Good -> Lightly Played
+}
+
+
 def normalize_condition(condition: str) -> str:
     """Normalize condition strings to standard format."""
-    condition = condition.strip()
-
-    # Common abbreviations
-    abbrevs = {
-        "NM": "Near Mint",
-        "LP": "Lightly Played",
-        "MP": "Moderately Played",
-        "HP": "Heavily Played",
-        "D": "Damaged",
-        "DM": "Damaged",
-        "DMG": "Damaged",
-        "PL": "Lightly Played",
-        "SP": "Lightly Played",  # Slightly Played -> Lightly Played
-        "EX": "Lightly Played",  # Excellent -> Lightly Played
-        "GD": "Lightly Played",  # Good -> Lightly Played
-        "VG": "Lightly Played",  # Very Good -> Lightly Played
-    }
-
-    upper = condition.upper()
-    if upper in abbrevs:
-        return abbrevs[upper]
-
-    # Already in full form
-    valid = ["Near Mint", "Lightly Played", "Moderately Played", "Heavily Played", "Damaged"]
-    for v in valid:
-        if v.lower() == condition.lower():
-            return v
-
     # Default to Near Mint if unrecognized
-    return "Near Mint"
+    return _CONDITION_LOOKUP.get(condition.strip().upper(), "Near Mint")
+
+
+def parse_price(value: str) -> Optional[float]:
+    """Parse a CSV price such as "1.50" or "$1,234.50". Returns None if blank or invalid."""
+    if not value:
+        return None
+
+    # Most exports write bare numbers; only strip currency formatting when needed
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return float(value.replace("$", "").replace(",", ""))
+    except ValueError:
+        return None
 
 
 def normalize_finish(finish: str) -> str:
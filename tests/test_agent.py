@@ -0,0 +1,237 @@
+"""
+Tests for the card-identification agent's local helpers (no network required).
+
+To run: pytest tests/test_agent.py -v
+"""
+
+import sqlite3
+
+import pytest
+
+from mtg_collector.services.agent import (
+    _BATCH_MAX_QUERIES,
+    SYSTEM_CONTENT,
+    SYSTEM_CONTENT_MODERN,
+    _open_agent_db,
+    _parameterize,
+    _prune_and_merge_fragments,
+    _remap_fragment_indices,
+    _system_content,
+    _tool_query_local_db_batch,
+)
+
+
+def _frag(text, x=0, y=0, w=100, h=20, confidence=0.9):
+    return {"text": text, "bbox": {"x": x, "y": y, "w": w, "h": h}, "confidence": confidence}
+
+
+@pytest.fixture
+def agent_conn(tmp_path):
+    """A small cards/printings/sets database opened the way the agent opens it."""
+    db_path = str(tmp_path / "agent.sqlite")
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        CREATE TABLE cards (oracle_id TEXT PRIMARY KEY, name TEXT);
+        CREATE TABLE sets (set_code TEXT PRIMARY KEY, set_name TEXT, released_at TEXT);
+        CREATE TABLE printings (
+            printing_id TEXT PRIMARY KEY, oracle_id TEXT, set_code TEXT,
+            collector_number TEXT, rarity TEXT, artist TEXT, finishes TEXT
+        );
+        INSERT INTO cards VALUES
+            ('o1', 'Forest'),
+            ('o2', 'Delver of Secrets // Insectile Aberration'),
+            ('o3', 'Fire // Ice'),
+            ('o4', 'Fir_ // Water');
+        INSERT INTO sets VALUES
+            ('m15', 'Magic 2015', '2014-07-18'),
+            ('isd', 'Innistrad', '2011-09-30'),
+            ('apc', 'Apocalypse', '2001-06-04');
+        INSERT INTO printings VALUES
+            ('p1', 'o1', 'm15', '269', 'common', 'Artist A', 'nonfoil'),
+            ('p2', 'o1', 'isd', '262', 'common', 'Artist B', 'nonfoil'),
+            ('p3', 'o2', 'isd', '51', 'common', 'Artist C', 'nonfoil'),
+            ('p4', 'o3', 'apc', '128', 'uncommon', 'Artist D', 'nonfoil'),
+            ('p5', 'o4', 'apc', '999', 'rare', 'Artist E', 'nonfoil');
+    """)
+    conn.commit()
+    conn.close()
+    conn = _open_agent_db(db_path)
+    yield conn
+    conn.close()
+
+
+class TestSystemContent:
+    @pytest.mark.parametrize("text", [
+        "R0092",
+        "C 0145",
+        "122/269 R",
+        "M15 . EN",
+        "EOE • EN",
+    ])
+    def test_modern_info_bar(self, text):
+        assert _system_content([_frag("Forest"), _frag(text)]) is SYSTEM_CONTENT_MODERN
+
+    @pytest.mark.parametrize("text", [
+        "Illus. Jeff A. Menges C1993 Wizards of the Coast",
+        "TM & C 1995 Wizards",
+        "47/143 C1998",
+        "S 1996",
+        "TM & © 2003 Wizards of the Coast, Inc.",
+    ])
+    def test_copyright_lines_are_not_modern(self, text):
+        assert _system_content([_frag("Llanowar Elves"), _frag(text)]) is SYSTEM_CONTENT
+
+    def test_no_info_bar(self):
+        assert _system_content([_frag("Llanowar Elves"), _frag("Creature — Elf Druid")]) is SYSTEM_CONTENT
+
+
+class TestQueryLocalDbBatch:
+    def test_groups_results_by_query(self, agent_conn):
+        out = _tool_query_local_db_batch(
+            [{"name": "forest", "set_code": "M15"}, {"name": "Delver of Secrets"}], agent_conn,
+        )
+        lines = out.splitlines()
+        assert lines[1] == "== [0] forest (M15) =="
+        assert lines[2].startswith("p1 | Forest | m15")
+        assert lines[3] == "== [1] Delver of Secrets =="
+        assert lines[4].startswith("p3 | Delver of Secrets // Insectile Aberration")
+        assert len(lines) == 5
+
+    def test_no_results(self, agent_conn):
+        out = _tool_query_local_db_batch([{"name": "Nonexistent"}], agent_conn)
+        assert out.splitlines()[-1] == "No results found in local cache"
+
+    def test_like_wildcards_in_name_are_literal(self, agent_conn):
+        out = _tool_query_local_db_batch([{"name": "Fir_"}, {"name": "Fi%"}], agent_conn)
+        assert "p5 |" in out
+        assert "p4 |" not in out
+
+    @pytest.mark.parametrize("queries", [
+        "Forest",
+        [],
+        ["Forest"],
+        [{"set_code": "m15"}],
+        [{"name": 7}],
+        [{"name": "  "}],
+        [{"name": "Forest", "set_code": 15}],
+        [{"name": "Forest"}] * (_BATCH_MAX_QUERIES + 1),
+    ])
+    def test_malformed_input_is_a_tool_error(self, agent_conn, queries):
+        assert _tool_query_local_db_batch(queries, agent_conn).startswith("Error:")
+
+    def test_sqlite_error_is_a_tool_result(self, tmp_path):
+        conn = _open_agent_db(str(tmp_path / "empty.sqlite"))
+        assert _tool_query_local_db_batch([{"name": "Forest"}], conn).startswith("SQL error:")
+        conn.close()
+
+
+class TestParameterize:
+    def test_equals_literal_is_bound(self):
+        assert _parameterize("SELECT * FROM cards WHERE name = 'Forest'") == (
+            "SELECT * FROM cards WHERE name = ?", ["Forest"],
+        )
+
+    def test_like_literal_is_bound(self):
+        assert _parameterize("SELECT * FROM cards WHERE name LIKE '%Elf%'") == (
+            "SELECT * FROM cards WHERE name LIKE ?", ["%Elf%"],
+        )
+
+    def test_in_list_literals_are_bound(self):
+        assert _parameterize("SELECT * FROM printings WHERE set_code IN ('m15','isd', 'apc')") == (
+            "SELECT * FROM printings WHERE set_code IN (?,?, ?)", ["m15", "isd", "apc"],
+        )
+
+    def test_json_extract_path_is_bound(self):
+        sql, params = _parameterize(
+            "SELECT printing_id FROM printings WHERE json_extract(raw_json, '$.flavor_name') = 'Vigor'"
+        )
+        assert sql == "SELECT printing_id FROM printings WHERE json_extract(raw_json, ?) = ?"
+        assert params == ["$.flavor_name", "Vigor"]
+
+    def test_doubled_quote_is_unescaped(self):
+        assert _parameterize("SELECT * FROM cards WHERE name = 'Jace''s Erasure'") == (
+            "SELECT * FROM cards WHERE name = ?", ["Jace's Erasure"],
+        )
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT name AS 'card name' FROM cards",
+        "SELECT name FROM cards ORDER BY 'name'",
+    ])
+    def test_non_value_literals_stay_inline(self, sql):
+        assert _parameterize(sql) == (sql, [])
+
+    def test_escape_literal_stays_inline(self):
+        sql, params = _parameterize("SELECT * FROM cards WHERE name LIKE 'Fir\\_%' ESCAPE '\\'")
+        assert sql == "SELECT * FROM cards WHERE name LIKE ? ESCAPE '\\'"
+        assert params == ["Fir\\_%"]
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT * FROM cards WHERE name = 'Forest' -- it's a land",
+        "SELECT * FROM cards /* don't */ WHERE name = 'Forest'",
+    ])
+    def test_sql_with_comments_is_unchanged(self, sql):
+        assert _parameterize(sql) == (sql, [])
+
+    @pytest.mark.parametrize("sql", [
+        "SELECT printing_id FROM printings WHERE set_code = 'isd' ORDER BY printing_id",
+        "SELECT name FROM cards WHERE name LIKE '%//%' ORDER BY name",
+        "SELECT printing_id FROM printings WHERE set_code IN ('m15', 'apc') ORDER BY printing_id",
+        "SELECT c.name AS 'card', p.set_code FROM cards c JOIN printings p ON p.oracle_id = c.oracle_id"
+        " WHERE c.name = 'Fire // Ice' OR p.rarity = 'rare' ORDER BY 'card'",
+        "SELECT name FROM cards WHERE name LIKE 'Fir\\_%' ESCAPE '\\'",
+        "SELECT CASE WHEN rarity = 'common' THEN 'C' ELSE 'X' END FROM printings ORDER BY printing_id",
+    ])
+    def test_same_rows_as_inline_sql(self, agent_conn, sql):
+        expected = [tuple(row) for row in agent_conn.execute(sql)]
+        assert expected
+        assert [tuple(row) for row in agent_conn.execute(*_parameterize(sql))] == expected
+
+
+class TestPruneAndMergeFragments:
+    def test_same_row_fragments_merge_left_to_right(self):
+        fragments = [
+            _frag("Elves", x=130, y=10, w=60, h=20, confidence=0.8),
+            _frag("Llanowar", x=20, y=12, w=100, h=20, confidence=0.95),
+            _frag("Creature — Elf Druid", x=20, y=200, w=200, h=20),
+        ]
+        spans, sources = _prune_and_merge_fragments(fragments)
+        assert [s["text"] for s in spans] == ["Llanowar Elves", "Creature — Elf Druid"]
+        assert spans[0]["bbox"] == {"x": 20, "y": 10, "w": 170, "h": 22}
+        assert spans[0]["confidence"] == 0.8
+        assert sources == [[1, 0], [2]]
+
+    def test_duplicate_reads_collapse_into_most_confident(self):
+        fragments = [
+            _frag("Forest", x=20, y=10, w=100, h=20, confidence=0.6),
+            _frag("Basic Land", x=20, y=200, w=100, h=20),
+            _frag("Forest", x=22, y=11, w=100, h=20, confidence=0.9),
+        ]
+        spans, sources = _prune_and_merge_fragments(fragments)
+        assert [s["text"] for s in spans] == ["Forest", "Basic Land"]
+        assert spans[0]["confidence"] == 0.9
+        assert sources == [[2, 0], [1]]
+
+    def test_same_text_apart_is_kept(self):
+        fragments = [
+            _frag("Forest", x=20, y=10, w=100, h=20),
+            _frag("Forest", x=20, y=300, w=100, h=20),
+        ]
+        spans, sources = _prune_and_merge_fragments(fragments)
+        assert len(spans) == 2
+        assert sources == [[0], [1]]
+
+    def test_remap_to_original_indices(self):
+        fragments = [
+            _frag("Elves", x=130, y=10, w=60, h=20),
+            _frag("Llanowar", x=20, y=12, w=100, h=20),
+            _frag("Creature — Elf Druid", x=20, y=200, w=200, h=20),
+            _frag("Llanowar", x=21, y=12, w=100, h=20, confidence=0.5),
+        ]
+        _, sources = _prune_and_merge_fragments(fragments)
+        cards = [
+            {"name": "Llanowar Elves", "printing_ids": ["p1"], "fragment_indices": [0]},
+            {"name": "Llanowar Elves", "printing_ids": ["p1"], "fragment_indices": [1, 0, 7, -1]},
+        ]
+        _remap_fragment_indices(cards, sources)
+        assert cards[0]["fragment_indices"] == [0, 1, 3]
+        assert cards[1]["fragment_indices"] == [0, 1, 2, 3]
@@ -205,6 +205,27 @@ class TestResolveCard:
         )
         assert sid is None
 
+    def test_resolve_with_prefetch_cache(self, repos, importer):
+        """ResolveCache answers the same lookups as per-row queries."""
+        from mtg_collector.importers.base import ResolveCache
+
+        lookups = [
+            ("Test Card Alpha", "TST", "001"),
+            ("Test Card Alpha", "tst", "002"),
+            ("Test Card Beta", None, None),
+            ("Front Face", None, None),
+            ("Nonexistent Card", "xxx", "999"),
+        ]
+        cache = ResolveCache(repos["card_repo"], repos["printing_repo"], lookups)
+        assert ("tst", "001") in cache.printings_by_set_cn
+        for name, set_code, cn in lookups:
+            expected = importer._resolve_card(
+                repos["card_repo"], repos["printing_repo"], name, set_code, cn,
+            )
+            assert importer._resolve_card(
+                repos["card_repo"], repos["printing_repo"], name, set_code, cn, cache,
+            ) == expected
+
 
 # ── TestImportFile ───────────────────────────────────────────────────
 
@@ -252,6 +273,140 @@ class TestImportFile:
         finally:
             os.unlink(csv_path)
 
+    def test_quantity_copies_each_get_status_log(self, repos, importer):
+        """Batched copies are distinct rows, each with its own status_log entry."""
+        csv_path = _write_csv([
+            {"Count": "4", "Name": "Test Card Beta", "Edition": "tst",
+             "Collector Number": "002", "Condition": "Near Mint",
+             "Foil": "", "Language": "English", "Purchase Price": ""},
+        ])
+        try:
+            importer.import_file(
+                csv_path, repos["conn"],
+                repos["card_repo"], repos["set_repo"],
+                repos["printing_repo"], repos["collection_repo"],
+            )
+            ids = [r[0] for r in repos["conn"].execute("SELECT id FROM collection ORDER BY id")]
+            logged = [r[0] for r in repos["conn"].execute(
+                "SELECT collection_id FROM status_log WHERE to_status = 'owned' ORDER BY collection_id"
+            )]
+            assert len(ids) == 4
+            assert logged == ids
+        finally:
+            os.unlink(csv_path)
+
+    def test_failed_insert_recorded_per_row(self, repos, importer):
+        """A row whose insert fails is an error; the rows batched with it still import."""
+        repos["conn"].execute(
+            f"CREATE TRIGGER reject_beta BEFORE INSERT ON collection "
+            f"WHEN NEW.printing_id = '{PRINTING_BETA_TST}' BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        )
+        csv_path = _write_csv([
+            {"Count": "2", "Name": "Test Card Alpha", "Edition": "tst",
+             "Collector Number": "001", "Condition": "Near Mint",
+             "Foil": "", "Language": "English", "Purchase Price": ""},
+            {"Count": "3", "Name": "Test Card Beta", "Edition": "tst",
+             "Collector Number": "002", "Condition": "Near Mint",
+             "Foil": "", "Language": "English", "Purchase Price": ""},
+        ])
+        try:
+            result = importer.import_file(
+                csv_path, repos["conn"],
+                repos["card_repo"], repos["set_repo"],
+                repos["printing_repo"], repos["collection_repo"],
+            )
+            assert result.cards_added == 2
+            assert result.cards_skipped == 1
+            assert len(result.errors) == 1
+            assert "rejected" in result.errors[0]
+            assert repos["collection_repo"].count() == 2
+            assert repos["conn"].execute("SELECT COUNT(*) FROM status_log").fetchone()[0] == 2
+        finally:
+            os.unlink(csv_path)
+
+    def test_import_shares_one_acquired_at(self, repos, importer):
+        """Every entry from one import carries the same acquired_at timestamp."""
+        csv_path = _write_csv([
+            {"Count": "2", "Name": "Test Card Alpha", "Edition": "tst",
+             "Collector Number": "001", "Condition": "Near Mint",
+             "Foil": "", "Language": "English", "Purchase Price": ""},
+            {"Count": "1", "Name": "Test Card Beta", "Edition": "tst",
+             "Collector Number": "002", "Condition": "Near Mint",
+             "Foil": "", "Language": "English", "Purchase Price": ""},
+        ])
+        try:
+            importer.import_file(
+                csv_path, repos["conn"],
+                repos["card_repo"], repos["set_repo"],
+                repos["printing_repo"], repos["collection_repo"],
+            )
+            stamps = {r[0] for r in repos["conn"].execute("SELECT acquired_at FROM collection")}
+            assert len(stamps) == 1
+        finally:
+            os.unlink(csv_path)
+
+    def test_repeated_lookup_resolved_once(self, repos, importer, monkeypatch):
+        """Rows sharing (name, set, cn) hit _resolve_card once."""
+        csv_path = _write_csv([
+            {"Count": "1", "Name": "Test Card Alpha", "Edition": "tst",
+             "Collector Number": "001", "Condition": "Near Mint",
+             "Foil": "", "Language": "English", "Purchase Price": ""},
+            {"Count": "2", "Name": "Test Card Alpha", "Edition": "tst",
+             "Collector Number": "001", "Condition": "Lightly Played",
+             "Foil": "foil", "Language": "English", "Purchase Price": ""},
+        ])
+        calls = []
+        original = MoxfieldImporter._resolve_card
+
+        def counting(self, *args):
+            calls.append(args[2:5])
+            return original(self, *args)
+
+        monkeypatch.setattr(MoxfieldImporter, "_resolve_card", counting)
+        try:
+            result = importer.import_file(
+                csv_path, repos["conn"],
+                repos["card_repo"], repos["set_repo"],
+                repos["printing_repo"], repos["collection_repo"],
+            )
+            assert result.cards_added == 3
+            assert calls == [("Test Card Alpha", "tst", "001")]
+        finally:
+            os.unlink(csv_path)
+
+    def test_archidekt_foil_and_nonfoil_copies(self, repos):
+        """Archidekt quantity + foil_quantity → foil copies then nonfoil copies."""
+        from mtg_collector.importers.archidekt import ArchidektImporter
+
+        fd, csv_path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write("quantity;foil_quantity;card_name;set_code;collector_number;lang\n")
+            f.write("2;1;Test Card Alpha;tst;001;en\n")
+        try:
+            result = ArchidektImporter().import_file(
+                csv_path, repos["conn"],
+                repos["card_repo"], repos["set_repo"],
+                repos["printing_repo"], repos["collection_repo"],
+            )
+            assert result.cards_added == 3
+            finishes = [r[0] for r in repos["conn"].execute("SELECT finish FROM collection ORDER BY id")]
+            assert finishes == ["foil", "nonfoil", "nonfoil"]
+        finally:
+            os.unlink(csv_path)
+
+    def test_parse_file_strips_padded_values(self, importer):
+        """Whitespace around CSV values is removed once at parse time."""
+        fd, csv_path = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(fd, "w", newline="") as f:
+            f.write("Count, Name, Edition, Collector Number, Foil\n")
+            f.write('2,  "Test Card Alpha" , tst , 001 ,  foil \n')
+        try:
+            rows = list(importer.parse_file(csv_path))
+            assert importer.row_to_lookup(rows[0]) == ("Test Card Alpha", "tst", "001", 2)
+            assert importer.row_to_entry(rows[0], PRINTING_ALPHA_TST).finish == "foil"
+        finally:
+            os.unlink(csv_path)
+
     def test_missing_card_skipped(self, repos, importer):
         """CSV with 1 known + 1 unknown card → 1 added, 1 error."""
         csv_path = _write_csv([
@@ -368,6 +523,22 @@ class TestDecklistImport:
         finally:
             os.unlink(path)
 
+    def test_detect_format_by_header_signature(self):
+        """Any one vendor-specific column is enough to pick Archidekt/Deckbox."""
+        from mtg_collector.importers import detect_format
+
+        cases = [
+            (["Count", "Name", "Edition", "Altered Art"], "deckbox"),
+            (["quantity", "card_name", "scryfall_uuid"], "archidekt"),
+            (["Count", "Name", "Condition"], "moxfield"),
+        ]
+        for fieldnames, expected in cases:
+            path = _write_csv([{f: "1" for f in fieldnames}], fieldnames=fieldnames)
+            try:
+                assert detect_format(path) == expected
+            finally:
+                os.unlink(path)
+
     def test_parse_decklist(self):
         """DecklistImporter.parse_file parses Moxfield text export."""
         from mtg_collector.importers.decklist import DecklistImporter
@@ -380,7 +551,7 @@ class TestDecklistImport:
             "",  # blank line should be skipped
         ])
         try:
-            rows = imp.parse_file(path)
+            rows = list(imp.parse_file(path))
             assert len(rows) == 3
 
             assert rows[0]["Name"] == "Auntie Ool, Cursewretch"
@@ -454,6 +625,21 @@ class TestDecklistImport:
         finally:
             os.unlink(path)
 
+    def test_parse_files_keeps_file_order(self):
+        """parse_files yields every file's rows, in file order."""
+        from mtg_collector.importers.decklist import DecklistImporter
+
+        paths = [
+            _write_decklist(["1 Test Card Alpha (tst) 001", "2 Test Card Beta (tst) 002"]),
+            _write_decklist(["3 Forest (ECL) 283"]),
+        ]
+        try:
+            rows = list(DecklistImporter().parse_files(paths))
+            assert [r["Name"] for r in rows] == ["Test Card Alpha", "Test Card Beta", "Forest"]
+        finally:
+            for path in paths:
+                os.unlink(path)
+
     def test_parse_error_missing_set_code(self):
         """Missing parenthesized set code gives a clear error."""
         from mtg_collector.importers.decklist import ParseError, parse_line